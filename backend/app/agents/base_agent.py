@@ -1,10 +1,29 @@
 """Abstract base class for all research analysis agents."""
 
+import asyncio
+import contextlib
+import functools
+import hashlib
+import inspect
 import json
+import logging
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
+from typing import Awaitable, Callable
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
 from app.models import Analysis
+from app.services.llm_service import partial_results, track_usage
+
+logger = logging.getLogger(__name__)
+
+# Per-agent LLM usage since startup, exposed under /api/metrics
+_token_stats: dict[str, dict] = {}
+
+
+def get_token_stats() -> dict:
+    return {name: dict(stats) for name, stats in _token_stats.items()}
 
 
 class BaseAgent(ABC):
@@ -12,33 +31,110 @@ class BaseAgent(ABC):
 
     name: str = "base"
     description: str = ""
+    # Tokens of paper text and upstream results packed into each prompt
+    input_token_budget: int = 3000
+    # Completion token cap per LLM call (reasoning tokens count against it)
+    max_output_tokens: int = 8192
+    # Shape of the JSON result (see app/agents/schemas.py)
+    output_schema: type[BaseModel] | None = None
+    # Wall-clock limit for one run and cap on concurrent runs across analyses;
+    # None uses AGENT_TIMEOUT_SECONDS / AGENT_MAX_CONCURRENCY
+    timeout_seconds: float | None = None
+    max_concurrency: int | None = None
+    # Bump when the agent's output changes for reasons its own source does not show
+    version: str = "1"
+    _semaphore: asyncio.Semaphore | None = None
+
+    @functools.cached_property
+    def fingerprint(self) -> str:
+        """Hash of what shapes this agent's output: version, code and prompts, budgets, schema."""
+        digest = hashlib.sha256(
+            f"{self.name}:{self.version}:{self.input_token_budget}:{self.max_output_tokens}".encode()
+        )
+        try:
+            digest.update(inspect.getsource(type(self)).encode())
+        except (OSError, TypeError):
+            pass  # source unavailable; the version alone has to do
+        if self.output_schema is not None:
+            digest.update(json.dumps(self.output_schema.model_json_schema(), sort_keys=True).encode())
+        return digest.hexdigest()[:16]
+
+    def _get_semaphore(self) -> asyncio.Semaphore | None:
+        limit = self.max_concurrency
+        if limit is None:
+            limit = get_settings().agent_max_concurrency
+        if limit <= 0:
+            return None
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(limit)
+        return self._semaphore
+
+    def slot(self):
+        """Async context manager holding one of this agent's concurrency slots."""
+        return self._get_semaphore() or contextlib.nullcontext()
 
     @abstractmethod
     async def _execute(self, paper_text: str, context: dict) -> dict:
         """Implement agent-specific logic. Returns a result dict."""
         ...
 
-    async def run(self, paper_id: str, paper_text: str, context: dict, db: AsyncSession) -> dict:
-        """Run the agent: execute, log, and save results."""
+    async def run(
+        self,
+        paper_id: str,
+        paper_text: str,
+        context: dict,
+        db: AsyncSession,
+        on_partial: Callable[[dict], Awaitable[None]] | None = None,
+        input_digest: str | None = None,
+    ) -> dict:
+        """Run the agent: execute, log, and save results.
+
+        ``on_partial`` receives completed parts of the result while the LLM
+        is still generating it (see llm_service.partial_results).
+        ``input_digest`` is stored with the result so it can be reused while
+        the inputs stay the same.
+        """
         analysis = Analysis(
             paper_id=paper_id,
             agent_name=self.name,
+            input_digest=input_digest,
             status="running",
             started_at=datetime.now(timezone.utc),
         )
         db.add(analysis)
         await db.commit()
 
-        try:
-            result = await self._execute(paper_text, context)
-            analysis.result = json.dumps(result, ensure_ascii=False)
-            analysis.status = "completed"
-            analysis.finished_at = datetime.now(timezone.utc)
-            await db.commit()
-            return result
-        except Exception as e:
-            analysis.status = "error"
-            analysis.error = str(e)
-            analysis.finished_at = datetime.now(timezone.utc)
-            await db.commit()
-            return {"error": str(e)}
+        with track_usage() as usage, partial_results(on_partial):
+            try:
+                timeout = self.timeout_seconds
+                if timeout is None:
+                    timeout = get_settings().agent_timeout_seconds
+                try:
+                    result = await asyncio.wait_for(self._execute(paper_text, context), timeout or None)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"{self.name} timed out after {timeout:g}s") from None
+                analysis.result = json.dumps(result, ensure_ascii=False)
+                analysis.status = "completed"
+                analysis.finished_at = datetime.now(timezone.utc)
+                await db.commit()
+                return result
+            except Exception as e:
+                analysis.status = "error"
+                analysis.error = str(e)
+                analysis.finished_at = datetime.now(timezone.utc)
+                await db.commit()
+                return {"error": str(e)}
+            finally:
+                totals = _token_stats.setdefault(
+                    self.name, {"runs": 0, "calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+                )
+                totals["runs"] += 1
+                for key in ("calls", "prompt_tokens", "completion_tokens"):
+                    totals[key] += usage[key]
+                logger.info(
+                    "%s: %d prompt + %d completion tokens in %d LLM calls",
+                    self.name,
+                    usage["prompt_tokens"],
+                    usage["completion_tokens"],
+                    usage["calls"],
+                )
@@ -1,18 +1,24 @@
 """Agent 1 – Structured Extractor: extracts key research paper components."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import Extraction
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class ExtractorAgent(BaseAgent):
     name = "structured_extractor"
     description = "Extracts problem statement, methodology, dataset, results, and limitations"
+    output_schema = Extraction
+    input_token_budget = 4000
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
+        ctx = await run_cpu(pack_context, {"paper_text": paper_text}, self.input_token_budget)
         prompt = f"""Analyze the following research paper and extract structured information.
 
 RESEARCH PAPER TEXT:
-{paper_text[:12000]}
+{ctx["paper_text"]}
 
 Extract and return a JSON object with these exact keys:
 {{
@@ -45,4 +51,7 @@ Extract and return a JSON object with these exact keys:
             prompt,
             system_instruction="You are an expert research paper analyst. Extract information accurately and comprehensively. If information is not found, use 'Not specified' as the value.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
@@ -1,12 +1,17 @@
 """Agent 4 – Research Gap Detector: identifies limitations and unexplored areas."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import GapAnalysis
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class GapDetectorAgent(BaseAgent):
     name = "gap_detector"
     description = "Analyzes limitations, identifies unexplored areas, suggests improvements"
+    output_schema = GapAnalysis
+    input_token_budget = 3000
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
         extraction = context.get("structured_extractor", {})
@@ -16,23 +21,36 @@ class GapDetectorAgent(BaseAgent):
         future_work = extraction.get("future_work", [])
         comparison = related.get("comparison_summary", "")
         unique = related.get("unique_contributions", [])
+        ctx = await run_cpu(
+            pack_context,
+            {
+                "paper_text": paper_text,
+                "limitations": limitations,
+                "future_work": future_work,
+                "comparison": comparison,
+                "unique": unique,
+            },
+            self.input_token_budget,
+            weights={"paper_text": 4},
+            queries={"paper_text": [limitations, future_work, comparison]},
+        )
 
         prompt = f"""Perform a thorough research gap analysis for this paper.
 
 PAPER TEXT (excerpt):
-{paper_text[:8000]}
+{ctx["paper_text"]}
 
 EXTRACTED LIMITATIONS:
-{str(limitations)}
+{ctx["limitations"]}
 
 FUTURE WORK MENTIONED:
-{str(future_work)}
+{ctx["future_work"]}
 
 RELATED WORK COMPARISON:
-{comparison}
+{ctx["comparison"]}
 
 UNIQUE CONTRIBUTIONS:
-{str(unique)}
+{ctx["unique"]}
 
 Return a JSON object:
 {{
@@ -72,4 +90,7 @@ Return a JSON object:
             prompt,
             system_instruction="You are a senior researcher and peer reviewer. Be thorough, constructive, and specific in identifying gaps and suggesting improvements.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
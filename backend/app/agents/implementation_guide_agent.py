@@ -1,28 +1,40 @@
 """Agent 5 – Implementation Guide Generator: suggests tech stack and prototype plan."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import ImplementationGuide
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class ImplementationGuideAgent(BaseAgent):
     name = "implementation_guide"
     description = "Suggests tech stack, architecture outline, and prototype plan"
+    output_schema = ImplementationGuide
+    input_token_budget = 3000
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
         extraction = context.get("structured_extractor", {})
         methodology = extraction.get("methodology", {})
         results = extraction.get("results", {})
+        ctx = await run_cpu(
+            pack_context,
+            {"paper_text": paper_text, "methodology": methodology, "results": results},
+            self.input_token_budget,
+            weights={"paper_text": 2},
+            queries={"paper_text": methodology},
+        )
 
         prompt = f"""Based on the following research paper, generate a practical implementation guide for someone wanting to reproduce or build upon this work.
 
 PAPER TEXT (excerpt):
-{paper_text[:8000]}
+{ctx["paper_text"]}
 
 METHODOLOGY:
-{str(methodology)[:2000]}
+{ctx["methodology"]}
 
 RESULTS:
-{str(results)[:2000]}
+{ctx["results"]}
 
 Return a JSON object:
 {{
@@ -75,4 +87,7 @@ Return a JSON object:
             prompt,
             system_instruction="You are a senior software architect who specializes in turning research papers into practical implementations. Be specific, actionable, and realistic.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
@@ -1,12 +1,18 @@
 """Agent 6 – Knowledge Graph Builder: extracts entities and relationships into a graph."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import KnowledgeGraph
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class KnowledgeGraphAgent(BaseAgent):
     name = "knowledge_graph"
     description = "Extracts key entities and relationships to build an interactive knowledge graph"
+    output_schema = KnowledgeGraph
+    input_token_budget = 3500
+    max_output_tokens = 6144
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
         extraction = context.get("structured_extractor", {})
@@ -15,17 +21,30 @@ class KnowledgeGraphAgent(BaseAgent):
         results = extraction.get("results", {})
         contributions = extraction.get("contributions", [])
         limitations = extraction.get("limitations", [])
+        ctx = await run_cpu(
+            pack_context,
+            {
+                "paper_text": paper_text,
+                "methodology": methodology,
+                "results": results,
+                "contributions": contributions,
+                "limitations": limitations,
+            },
+            self.input_token_budget,
+            weights={"paper_text": 6, "methodology": 3, "results": 3},
+            queries={"paper_text": [methodology, contributions]},
+        )
 
         prompt = f"""Analyze this research paper and extract a knowledge graph of entities and their relationships.
 
 PAPER TEXT (excerpt):
-{paper_text[:10000]}
+{ctx["paper_text"]}
 
 EXTRACTED TITLE: {title}
-METHODOLOGY: {str(methodology)[:1500]}
-RESULTS: {str(results)[:1500]}
-CONTRIBUTIONS: {str(contributions)[:500]}
-LIMITATIONS: {str(limitations)[:500]}
+METHODOLOGY: {ctx["methodology"]}
+RESULTS: {ctx["results"]}
+CONTRIBUTIONS: {ctx["contributions"]}
+LIMITATIONS: {ctx["limitations"]}
 
 Extract entities (concepts, methods, datasets, metrics, tools, findings) and their relationships.
 
@@ -70,4 +89,7 @@ IMPORTANT RULES:
             prompt,
             system_instruction="You are a knowledge graph extraction specialist. Extract precise, meaningful entities and relationships from research papers. Ensure every node ID used in edges exists in the nodes list. Be thorough but avoid redundancy.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
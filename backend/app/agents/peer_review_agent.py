@@ -1,12 +1,18 @@
 """Agent 8 – AI Peer Review Simulator: simulates a multi-reviewer conference review."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import PeerReview
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class PeerReviewAgent(BaseAgent):
     name = "peer_review"
     description = "Simulates a full academic peer review with multiple virtual reviewers"
+    output_schema = PeerReview
+    input_token_budget = 4000
+    max_output_tokens = 6144
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
         extraction = context.get("structured_extractor", {})
@@ -15,17 +21,30 @@ class PeerReviewAgent(BaseAgent):
         results = extraction.get("results", {})
         contributions = extraction.get("contributions", [])
         limitations = extraction.get("limitations", [])
+        ctx = await run_cpu(
+            pack_context,
+            {
+                "paper_text": paper_text,
+                "methodology": methodology,
+                "results": results,
+                "contributions": contributions,
+                "limitations": limitations,
+            },
+            self.input_token_budget,
+            weights={"paper_text": 5, "methodology": 2, "results": 2},
+            queries={"paper_text": [methodology, results, contributions, limitations]},
+        )
 
         prompt = f"""You are simulating a full academic peer review process for a research paper submission.
 Generate reviews from 3 different reviewers, each with a distinct expertise and perspective.
 
 PAPER BEING REVIEWED:
 Title: {title}
-Text (excerpt): {paper_text[:10000]}
-Methodology: {str(methodology)[:2000]}
-Results: {str(results)[:2000]}
-Contributions: {str(contributions)[:1000]}
-Limitations: {str(limitations)[:1000]}
+Text (excerpt): {ctx["paper_text"]}
+Methodology: {ctx["methodology"]}
+Results: {ctx["results"]}
+Contributions: {ctx["contributions"]}
+Limitations: {ctx["limitations"]}
 
 IMPORTANT: Create 3 genuinely different reviewers with contrasting viewpoints. One should be more positive, one more critical, and one balanced. Each should focus on different aspects based on their expertise.
 
@@ -79,4 +98,7 @@ Generate 3 complete, distinct reviews. Be thorough and realistic.
             prompt,
             system_instruction="You are simulating the peer review process of a top academic conference. Generate realistic, detailed, and constructive reviews from 3 different expert perspectives. Be fair but rigorous.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
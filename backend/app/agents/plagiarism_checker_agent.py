@@ -1,13 +1,20 @@
 """Agent 7 – Plagiarism Checker: detects potential overlap with existing published work."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import ClaimList, OriginalityReport
 from app.services.semantic_scholar import search_related
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class PlagiarismCheckerAgent(BaseAgent):
     name = "plagiarism_checker"
     description = "Checks paper originality against existing published research"
+    output_schema = OriginalityReport
+    input_token_budget = 3000
+    max_output_tokens = 4096
+    max_concurrency = 2  # Semantic Scholar rate-limits unauthenticated clients
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
         extraction = context.get("structured_extractor", {})
@@ -17,15 +24,22 @@ class PlagiarismCheckerAgent(BaseAgent):
         results = extraction.get("results", {})
 
         # Step 1: Extract key claims from the paper using LLM
+        ctx = await run_cpu(
+            pack_context,
+            {"paper_text": paper_text, "contributions": contributions, "methodology": methodology},
+            self.input_token_budget,
+            weights={"paper_text": 8},
+            queries={"paper_text": [contributions, methodology]},
+        )
         claims_prompt = f"""Extract the 8-10 most important and specific claims or contributions from this research paper.
 Focus on claims that could potentially overlap with existing published work.
 
 PAPER TEXT (excerpt):
-{paper_text[:8000]}
+{ctx["paper_text"]}
 
 TITLE: {title}
-CONTRIBUTIONS: {str(contributions)[:1000]}
-METHODOLOGY: {str(methodology)[:1000]}
+CONTRIBUTIONS: {ctx["contributions"]}
+METHODOLOGY: {ctx["methodology"]}
 
 Return a JSON object:
 {{
@@ -43,6 +57,8 @@ Return a JSON object:
             claims_prompt,
             system_instruction="You are an academic integrity expert. Extract precise, verifiable claims from research papers.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=ClaimList,
         )
         claims = claims_result.get("claims", [])
         if not claims:
@@ -68,18 +84,25 @@ Return a JSON object:
                 continue
 
         # Step 3: LLM-based comparison for originality scoring
+        ctx = await run_cpu(
+            pack_context,
+            {"claims": claims, "paper_text": paper_text, "sources": all_sources},
+            self.input_token_budget,
+            weights={"paper_text": 2, "sources": 2},
+            queries={"paper_text": claims},
+        )
         analysis_prompt = f"""You are an academic plagiarism and originality checker. Compare the paper's claims against potentially similar published work.
 
 PAPER BEING CHECKED:
 Title: {title}
 Key Claims:
-{str(claims)[:3000]}
+{ctx["claims"]}
 
 Paper Text Excerpt:
-{paper_text[:6000]}
+{ctx["paper_text"]}
 
 POTENTIALLY SIMILAR PUBLISHED WORK:
-{str(all_sources)[:5000]}
+{ctx["sources"]}
 
 Analyze the originality of this paper. For each claim, determine if it overlaps with existing work.
 
@@ -127,6 +150,9 @@ IMPORTANT RULES:
             analysis_prompt,
             system_instruction="You are a fair, thorough academic plagiarism detector. Distinguish between legitimate building-on-prior-work and actual problematic overlap. Be accurate with similarity scores.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
 
         # Attach raw search data
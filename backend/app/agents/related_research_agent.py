@@ -1,14 +1,20 @@
 """Agent 3 – Related Research Finder: discovers and compares similar papers."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import RelatedResearch
 from app.services.semantic_scholar import search_related
 from app.services.arxiv_client import search_papers
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class RelatedResearchAgent(BaseAgent):
     name = "related_research"
     description = "Finds similar papers and compares contributions"
+    output_schema = RelatedResearch
+    input_token_budget = 2000
+    max_concurrency = 2  # Semantic Scholar / arXiv rate-limit unauthenticated clients
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
         extraction = context.get("structured_extractor", {})
@@ -23,17 +29,23 @@ class RelatedResearchAgent(BaseAgent):
         arxiv_results = await search_papers(search_query, max_results=5)
 
         # Use LLM to analyze and compare
+        ctx = await run_cpu(
+            pack_context,
+            {"methodology": methodology, "s2_results": s2_results, "arxiv_results": arxiv_results},
+            self.input_token_budget,
+            weights={"s2_results": 3, "arxiv_results": 3},
+        )
         prompt = f"""Given the following research paper and related papers found, provide a comparative analysis.
 
 CURRENT PAPER:
 Title: {title}
-Methodology: {str(methodology)[:1000]}
+Methodology: {ctx["methodology"]}
 
 RELATED PAPERS FROM SEMANTIC SCHOLAR:
-{str(s2_results)[:3000]}
+{ctx["s2_results"]}
 
 RELATED PAPERS FROM ARXIV:
-{str(arxiv_results)[:3000]}
+{ctx["arxiv_results"]}
 
 Return a JSON object:
 {{
@@ -60,6 +72,9 @@ Include up to 10 most relevant papers. Deduplicate across sources.
             prompt,
             system_instruction="You are a research librarian expert at finding connections between papers.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
 
         # Merge raw API results with LLM analysis
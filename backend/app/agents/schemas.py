@@ -0,0 +1,342 @@
+"""Pydantic models for the JSON each agent asks the LLM to return.
+
+Models mirror the shapes spelled out in the agent prompts. Every field has a
+default and unknown keys are kept, so a response that is merely incomplete
+still validates; scalar fields accept the nearby types models tend to emit
+(numbers for strings, strings for numbers, a string for a list).
+"""
+
+import json
+from typing import Annotated, Any
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+
+def _to_text(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _to_list(value: Any) -> Any:
+    if value is None:
+        return []
+    if isinstance(value, (str, dict)):
+        return [value]
+    return value
+
+
+def _to_number(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            number = float(value.strip().rstrip("%"))
+        except ValueError:
+            return None
+        return int(number) if number.is_integer() else number
+    return value
+
+
+Text = Annotated[str, BeforeValidator(_to_text)]
+TextList = Annotated[list[Text], BeforeValidator(_to_list)]
+Number = Annotated[int | float | None, BeforeValidator(_to_number)]
+
+
+class Schema(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+def ListOf(model: type[BaseModel]):
+    return Annotated[list[model], BeforeValidator(_to_list)]
+
+
+# ── Structured extractor ──────────────────────────────────────────
+
+
+class Methodology(Schema):
+    approach: Text = ""
+    techniques: TextList = []
+    description: Text = ""
+
+
+class Dataset(Schema):
+    name: Text = ""
+    description: Text = ""
+    size: Text = ""
+    source: Text = ""
+
+
+class Results(Schema):
+    key_findings: TextList = []
+    metrics: dict[str, Any] = {}
+    comparison: Text = ""
+
+
+class Extraction(Schema):
+    title: Text = ""
+    authors: TextList = []
+    problem_statement: Text = ""
+    objectives: TextList = []
+    methodology: Methodology = Field(default_factory=Methodology)
+    dataset: Dataset = Field(default_factory=Dataset)
+    results: Results = Field(default_factory=Results)
+    limitations: TextList = []
+    contributions: TextList = []
+    future_work: TextList = []
+
+
+# ── Simplifier ────────────────────────────────────────────────────
+
+
+class BeginnerLevel(Schema):
+    summary: Text = ""
+    key_concepts: TextList = []
+    analogy: Text = ""
+
+
+class IntermediateLevel(Schema):
+    summary: Text = ""
+    technical_concepts: TextList = []
+    significance: Text = ""
+
+
+class ExpertLevel(Schema):
+    summary: Text = ""
+    novelty: Text = ""
+    technical_depth: Text = ""
+    critique: Text = ""
+
+
+class Simplification(Schema):
+    beginner: BeginnerLevel = Field(default_factory=BeginnerLevel)
+    intermediate: IntermediateLevel = Field(default_factory=IntermediateLevel)
+    expert: ExpertLevel = Field(default_factory=ExpertLevel)
+    key_takeaways: TextList = []
+    one_liner: Text = ""
+
+
+# ── Related research ──────────────────────────────────────────────
+
+
+class RelatedPaper(Schema):
+    title: Text = ""
+    authors: TextList = []
+    year: Number = None
+    citation_count: Number = None
+    url: Text = ""
+    relevance: Text = ""
+    similarity_score: Number = None
+
+
+class RelatedResearch(Schema):
+    related_papers: ListOf(RelatedPaper) = []
+    comparison_summary: Text = ""
+    unique_contributions: TextList = []
+    research_landscape: Text = ""
+    most_cited_related: Text = ""
+
+
+# ── Gap detector ──────────────────────────────────────────────────
+
+
+class Gap(Schema):
+    gap: Text = ""
+    severity: Text = ""
+    category: Text = ""
+    evidence: Text = ""
+
+
+class UnexploredArea(Schema):
+    area: Text = ""
+    potential_impact: Text = ""
+    suggested_approach: Text = ""
+
+
+class ImprovementSuggestion(Schema):
+    suggestion: Text = ""
+    type: Text = ""
+    difficulty: Text = ""
+    expected_impact: Text = ""
+
+
+class NoveltyAssessment(Schema):
+    score: Number = None
+    justification: Text = ""
+    strengths: TextList = []
+    weaknesses: TextList = []
+
+
+class GapAnalysis(Schema):
+    identified_gaps: ListOf(Gap) = []
+    unexplored_areas: ListOf(UnexploredArea) = []
+    improvement_suggestions: ListOf(ImprovementSuggestion) = []
+    novelty_assessment: NoveltyAssessment = Field(default_factory=NoveltyAssessment)
+    overall_gap_summary: Text = ""
+
+
+# ── Implementation guide ──────────────────────────────────────────
+
+
+class TechStack(Schema):
+    programming_languages: TextList = []
+    frameworks: TextList = []
+    infrastructure: TextList = []
+    estimated_cost: Text = ""
+
+
+class Component(Schema):
+    name: Text = ""
+    purpose: Text = ""
+    technologies: TextList = []
+    complexity: Text = ""
+
+
+class Architecture(Schema):
+    overview: Text = ""
+    components: ListOf(Component) = []
+    data_flow: Text = ""
+
+
+class Phase(Schema):
+    title: Text = ""
+    duration: Text = ""
+    tasks: TextList = []
+    deliverables: TextList = []
+
+
+class PrototypePlan(Schema):
+    phase_1: Phase = Field(default_factory=Phase)
+    phase_2: Phase = Field(default_factory=Phase)
+    phase_3: Phase = Field(default_factory=Phase)
+
+
+class ImplementationGuide(Schema):
+    tech_stack: TechStack = Field(default_factory=TechStack)
+    architecture: Architecture = Field(default_factory=Architecture)
+    prototype_plan: PrototypePlan = Field(default_factory=PrototypePlan)
+    code_skeleton: Text = ""
+    key_challenges: TextList = []
+    prerequisites: TextList = []
+    datasets_needed: TextList = []
+    evaluation_strategy: Text = ""
+
+
+# ── Knowledge graph ───────────────────────────────────────────────
+
+
+class GraphNode(Schema):
+    id: Text = ""
+    label: Text = ""
+    type: Text = "concept"
+    importance: Number = None
+    description: Text = ""
+
+
+class GraphEdge(Schema):
+    source: Text = ""
+    target: Text = ""
+    label: Text = ""
+    strength: Number = None
+
+
+class GraphCluster(Schema):
+    name: Text = ""
+    node_ids: TextList = []
+
+
+class KnowledgeGraph(Schema):
+    nodes: ListOf(GraphNode) = []
+    edges: ListOf(GraphEdge) = []
+    clusters: ListOf(GraphCluster) = []
+    summary: Text = ""
+
+
+# ── Plagiarism checker ────────────────────────────────────────────
+
+
+class Claim(Schema):
+    id: Text = ""
+    text: Text = ""
+    category: Text = ""
+    search_query: Text = ""
+
+
+class ClaimList(Schema):
+    claims: ListOf(Claim) = []
+
+
+class FlaggedSection(Schema):
+    claim_id: Text = ""
+    claim_text: Text = ""
+    severity: Text = ""
+    overlap_percentage: Number = None
+    explanation: Text = ""
+    similar_source_title: Text = ""
+    similar_source_url: Text = ""
+
+
+class MatchedSource(Schema):
+    title: Text = ""
+    authors: Text = ""
+    year: Number = None
+    url: Text = ""
+    similarity_score: Number = None
+    overlap_description: Text = ""
+
+
+class OriginalityReport(Schema):
+    overall_originality_score: Number = None
+    verdict: Text = ""
+    verdict_label: Text = ""
+    flagged_sections: ListOf(FlaggedSection) = []
+    matched_sources: ListOf(MatchedSource) = []
+    original_contributions: TextList = []
+    summary: Text = ""
+
+
+# ── Peer review ───────────────────────────────────────────────────
+
+
+class ReviewScores(Schema):
+    novelty: Number = None
+    technical_quality: Number = None
+    clarity: Number = None
+    significance: Number = None
+    reproducibility: Number = None
+    experimental_design: Number = None
+
+
+class Review(Schema):
+    reviewer_id: Text = ""
+    expertise: Text = ""
+    confidence: Number = None
+    overall_score: Number = None
+    scores: ReviewScores = Field(default_factory=ReviewScores)
+    summary: Text = ""
+    strengths: TextList = []
+    weaknesses: TextList = []
+    questions: TextList = []
+    detailed_comments: Text = ""
+    recommendation: Text = ""
+
+
+class MetaReview(Schema):
+    decision: Text = ""
+    average_score: Number = None
+    consensus_summary: Text = ""
+    key_strengths: TextList = []
+    key_concerns: TextList = []
+    recommendation_to_authors: Text = ""
+    verdict_reasoning: Text = ""
+
+
+class PeerReview(Schema):
+    conference: Text = ""
+    paper_title: Text = ""
+    reviewers: ListOf(Review) = []
+    meta_review: MetaReview = Field(default_factory=MetaReview)
+    review_quality_note: Text = ""
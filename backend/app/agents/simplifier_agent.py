@@ -1,26 +1,39 @@
 """Agent 2 – Simplifier: generates multi-level explanations of the paper."""
 
 from app.agents.base_agent import BaseAgent
+from app.agents.schemas import Simplification
 from app.services.llm_service import generate_json
+from app.services.cpu_executor import run_cpu
+from app.services.prompt_budget import pack_context
 
 
 class SimplifierAgent(BaseAgent):
     name = "simplifier"
     description = "Generates beginner, intermediate, and expert-level explanations"
+    output_schema = Simplification
+    input_token_budget = 3500
+    max_output_tokens = 4096
 
     async def _execute(self, paper_text: str, context: dict) -> dict:
         extraction = context.get("structured_extractor", {})
         title = extraction.get("title", "this research paper")
+        ctx = await run_cpu(
+            pack_context,
+            {"paper_text": paper_text, "extraction": extraction},
+            self.input_token_budget,
+            weights={"paper_text": 3},
+            queries={"paper_text": extraction},
+        )
 
         prompt = f"""Based on the following research paper, generate explanations at three different levels of complexity.
 
 PAPER TITLE: {title}
 
 PAPER TEXT:
-{paper_text[:10000]}
+{ctx["paper_text"]}
 
 EXTRACTED INFORMATION:
-{str(extraction)[:3000]}
+{ctx["extraction"]}
 
 Return a JSON object with these exact keys:
 {{
@@ -48,4 +61,7 @@ Return a JSON object with these exact keys:
             prompt,
             system_instruction="You are an expert science communicator who can explain complex research at any level. Be accurate, engaging, and clear.",
             agent_name=self.name,
+            max_tokens=self.max_output_tokens,
+            schema=self.output_schema,
+            stream_partials=True,
         )
@@ -8,15 +8,84 @@ import os
 class Settings(BaseSettings):
     cerebras_api_key: str = ""
     cerebras_api_key_secondary: str = ""
+    llm_max_connections: int = 32  # per model client; caps in-flight LLM requests
+    llm_timeout_seconds: float = 300.0
+    # Per-model scheduling: concurrency cap and token bucket (requests/minute, 0 = unlimited)
+    llm_primary_max_concurrency: int = 8
+    llm_primary_rpm: float = 30
+    llm_primary_burst: int = 10
+    llm_support_max_concurrency: int = 8
+    llm_support_rpm: float = 30
+    llm_support_burst: int = 10
+    # Opt-in on-disk LLM response cache
+    llm_cache_enabled: bool = False
+    llm_cache_path: str = "./llm_cache.sqlite"
+    llm_cache_ttl_seconds: float = 7 * 24 * 3600
+    llm_cache_max_mb: int = 256
+    llm_cache_bypass_agents: str = ""  # comma-separated agent names
+    # Resilience: jittered exponential retries, per-route circuit breaker, optional hedging
+    llm_retry_attempts: int = 3
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 8.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 95.0  # fire the fallback route after this latency percentile
+    llm_hedge_min_delay_seconds: float = 5.0
+    llm_structured_output: str = "json_object"  # "json_schema", "json_object" or "off"
+    # "cerebras" (live), "fake" (offline), "record" or "replay" (see llm_providers.py)
+    llm_provider: str = "cerebras"
+    llm_fake_latency: str = "lognormal:0.8:0.5"  # time to first token: fixed:S, uniform:A:B, lognormal:MEDIAN:SIGMA
+    llm_fake_tokens_per_second: float = 400.0
+    llm_fake_error_rate: float = 0.0
+    llm_fake_seed: int = 0
+    llm_replay_dir: str = "./llm_recordings"
+    llm_replay_speed: float = 1.0  # multiplier on recorded latency; 0 = instant
+    # Agent pipeline defaults; agents may override them (see BaseAgent)
+    agent_timeout_seconds: float = 900.0  # 0 = no timeout
+    agent_max_concurrency: int = 0  # concurrent runs of one agent across analyses, 0 = unlimited
+    # Background analysis jobs (see job_queue.py)
+    job_workers: int = 2  # analyses run concurrently per process
+    job_max_attempts: int = 3
+    job_retry_delay_seconds: float = 30.0
+    job_lease_seconds: float = 60.0  # a running job not heartbeated for this long is re-queued
+    job_poll_interval_seconds: float = 2.0
+    job_bulk_max_in_flight: int = 0  # bulk-analysis jobs running at once, 0 = up to JOB_WORKERS
+    progress_buffer_size: int = 512  # progress events kept per paper for SSE replay
+    log_level: str = "INFO"  # level of the app.* loggers (agent token usage, critical paths, jobs)
     database_url: str = "sqlite+aiosqlite:///./research.db"
     cors_origins: str = "http://localhost:3000,http://localhost:3001,http://127.0.0.1:3000,http://127.0.0.1:3001"
     upload_dir: str = "./uploads"
     vector_store_dir: str = "./vector_stores"
+    vector_cache_max_entries: int = 64
+    vector_cache_max_mb: int = 512
+    embedding_cache_path: str = ""  # defaults to <vector_store_dir>/embedding_cache.sqlite
+    cpu_executor_kind: str = "thread"  # "thread" or "process"
+    cpu_executor_workers: int = 4
+    cpu_executor_max_queue: int = 64
+    embedding_batch_max_size: int = 64
+    embedding_batch_max_wait_ms: float = 5.0
+    chunking_mode: str = "tokens"  # "tokens" (model tokenizer) or "words" (legacy)
+    chunk_overlap_tokens: int = 32
+    retrieval_mode: str = "hybrid"  # "dense", "lexical" or "hybrid"
+    rrf_k: int = 60
+    vector_index_type: str = "flat"  # "flat", "sq16", "sq8" or "pq"
+    vector_index_pq_m: int = 16  # PQ sub-quantizers; must divide the embedding dim
+    global_index_type: str = "hnsw"  # "hnsw" or "ivf"
+    global_index_hnsw_m: int = 32
+    global_index_ef_search: int = 64
+    global_index_ivf_nlist: int = 1024
+    global_index_nprobe: int = 16
+    global_index_save_every: int = 20
 
     @property
     def cors_origin_list(self) -> list[str]:
         return [o.strip() for o in self.cors_origins.split(",")]
 
+    @property
+    def llm_cache_bypass_agent_set(self) -> set[str]:
+        return {a.strip() for a in self.llm_cache_bypass_agents.split(",") if a.strip()}
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
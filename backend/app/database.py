@@ -1,5 +1,6 @@
 """Async SQLAlchemy database setup."""
 
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from app.config import get_settings
@@ -16,8 +17,20 @@ async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit
 async def init_db():
     """Create all tables."""
     async with engine.begin() as conn:
-        from app.models import Paper, Analysis, ChatMessage, Workspace, WorkspacePaper  # noqa: F401
+        from app.models import Paper, Analysis, AnalysisBatch, AnalysisJob, ChatMessage, Workspace, WorkspacePaper  # noqa: F401
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+
+
+def _add_missing_columns(conn):
+    """Add columns introduced since a table was created (create_all skips existing tables)."""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
 
 
 async def get_db():
@@ -2,7 +2,7 @@
 
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, Text, DateTime, ForeignKey, Enum as SAEnum
+from sqlalchemy import String, Text, DateTime, Integer, ForeignKey, Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 import enum
@@ -45,6 +45,7 @@ class Paper(Base):
 
     analyses: Mapped[list["Analysis"]] = relationship(back_populates="paper", cascade="all, delete-orphan")
     chat_messages: Mapped[list["ChatMessage"]] = relationship(back_populates="paper", cascade="all, delete-orphan")
+    jobs: Mapped[list["AnalysisJob"]] = relationship(back_populates="paper", cascade="all, delete-orphan")
 
 
 class Analysis(Base):
@@ -56,6 +57,8 @@ class Analysis(Base):
     result: Mapped[str] = mapped_column(Text, default="{}")
     status: Mapped[str] = mapped_column(String(50), default="pending")
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Hash of everything the result depends on (see orchestrator.input_digest)
+    input_digest: Mapped[str | None] = mapped_column(String(64), nullable=True)
     started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -65,6 +68,58 @@ class Analysis(Base):
     paper: Mapped["Paper"] = relationship(back_populates="analyses")
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    ERROR = "error"
+
+
+class AnalysisJob(Base):
+    """A queued or running analysis of one paper (see app/services/job_queue.py)."""
+
+    __tablename__ = "analysis_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
+    paper_id: Mapped[str] = mapped_column(ForeignKey("papers.id"), index=True)
+    status: Mapped[str] = mapped_column(String(20), default=JobStatus.QUEUED.value, index=True)
+    # "full" reruns every agent; "incremental" reuses results whose inputs are unchanged
+    mode: Mapped[str | None] = mapped_column(String(20), default="full")
+    # Set for jobs created by a bulk analysis; they yield to interactive jobs
+    batch_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    worker_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Not picked up before this time (retry backoff)
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    # A running job whose lease expires is assumed abandoned and re-queued
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Agents finished (completed, failed or reused) in the current attempt
+    agents_finished: Mapped[int | None] = mapped_column(Integer, nullable=True, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    paper: Mapped["Paper"] = relationship(back_populates="jobs")
+
+
+class AnalysisBatch(Base):
+    """A bulk analysis: the jobs it queued or joined (see app/routers/batches.py)."""
+
+    __tablename__ = "analysis_batches"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
+    workspace_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    job_ids: Mapped[str] = mapped_column(Text, default="[]")  # JSON list
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
@@ -1,10 +1,10 @@
-"""DAG-based agent orchestrator with SSE progress streaming."""
+"""DAG-based agent orchestrator with progress callbacks."""
 
 import asyncio
+import hashlib
 import json
-from typing import AsyncGenerator, Callable, Awaitable
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+import logging
+from typing import Callable, Awaitable
 from app.agents.extractor_agent import ExtractorAgent
 from app.agents.simplifier_agent import SimplifierAgent
 from app.agents.related_research_agent import RelatedResearchAgent
@@ -13,10 +13,11 @@ from app.agents.implementation_guide_agent import ImplementationGuideAgent
 from app.agents.knowledge_graph_agent import KnowledgeGraphAgent
 from app.agents.plagiarism_checker_agent import PlagiarismCheckerAgent
 from app.agents.peer_review_agent import PeerReviewAgent
-from app.rag.retriever import build_paper_index
-from app.models import Paper, PaperStatus
+from app.rag.retriever import index_paper
 from app.database import async_session
 
+logger = logging.getLogger(__name__)
+
 
 # Agent instances
 AGENTS = {
@@ -30,129 +31,202 @@ AGENTS = {
     "peer_review": PeerReviewAgent(),
 }
 
-# Execution pipeline: (stage_name, [agents], [dependencies])
-PIPELINE = [
-    ("extraction", ["structured_extractor"], []),
-    ("parallel_analysis", ["simplifier", "related_research", "implementation_guide", "knowledge_graph", "plagiarism_checker", "peer_review"], ["structured_extractor"]),
-    ("gap_analysis", ["gap_detector"], ["structured_extractor", "related_research"]),
-]
+# Dependency graph: each agent starts as soon as the agents it reads from have
+# finished. The RAG index is built alongside, since no agent reads it.
+PIPELINE: dict[str, list[str]] = {
+    "structured_extractor": [],
+    "simplifier": ["structured_extractor"],
+    "related_research": ["structured_extractor"],
+    "implementation_guide": ["structured_extractor"],
+    "knowledge_graph": ["structured_extractor"],
+    "plagiarism_checker": ["structured_extractor"],
+    "peer_review": ["structured_extractor"],
+    "gap_detector": ["structured_extractor", "related_research"],
+}
+RAG_INDEXER = "rag_indexer"
+# Progress detail of an agent whose previous result was reused
+REUSED = "Inputs unchanged; reused previous result"
+
+
+def _topological_order(graph: dict[str, list[str]]) -> list[str]:
+    """Order nodes so each comes after its dependencies; ValueError on unknown deps or cycles."""
+    order: list[str] = []
+    remaining = dict(graph)
+    while remaining:
+        ready = [name for name, deps in remaining.items() if all(d in order for d in deps)]
+        if not ready:
+            unknown = {d for deps in remaining.values() for d in deps} - graph.keys()
+            if unknown:
+                raise ValueError(f"Unknown pipeline dependencies: {', '.join(sorted(unknown))}")
+            raise ValueError(f"Pipeline dependency cycle among: {', '.join(sorted(remaining))}")
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+    return order
+
+
+PIPELINE_ORDER = _topological_order(PIPELINE)
+
+
+def critical_path(graph: dict[str, list[str]], timings: dict[str, tuple[float, float]]) -> list[str]:
+    """The chain of nodes that determined the finish time, given (start, end) timings.
+
+    Walks back from the last node to finish, each time through the dependency
+    that finished last (the one the node was waiting for).
+    """
+    if not timings:
+        return []
+    node = max(timings, key=lambda n: timings[n][1])
+    path = [node]
+    while True:
+        deps = [d for d in graph.get(node, []) if d in timings]
+        if not deps:
+            return path[::-1]
+        node = max(deps, key=lambda d: timings[d][1])
+        path.append(node)
+
+
+def _hash(value) -> str:
+    data = value if isinstance(value, str) else json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def input_digest(name: str, paper_hash: str, context: dict) -> str:
+    """Digest of an agent's inputs: the paper text, the agent's fingerprint and its upstream results."""
+    return _hash({
+        "paper": paper_hash,
+        "agent": AGENTS[name].fingerprint,
+        "upstream": {dep: _hash(context.get(dep, {})) for dep in PIPELINE[name]},
+    })
+
+
+_pipeline_stats = {"runs": 0, "total_seconds": 0.0, "agents_run": 0, "agents_reused": 0, "last_critical_path": []}
+
+
+def get_pipeline_stats() -> dict:
+    runs = _pipeline_stats["runs"]
+    return {
+        "runs": runs,
+        "avg_seconds": round(_pipeline_stats["total_seconds"] / runs, 2) if runs else None,
+        "agents_run": _pipeline_stats["agents_run"],
+        "agents_reused": _pipeline_stats["agents_reused"],
+        "last_critical_path": _pipeline_stats["last_critical_path"],
+    }
 
 
 async def run_pipeline(
     paper_id: str,
     paper_text: str,
-    db: AsyncSession,
-    progress_callback: Callable[[str, str, str], Awaitable[None]] | None = None,
+    progress_callback: Callable[[str, str, str, dict | None], Awaitable[None]] | None = None,
+    previous: dict[str, tuple[str, dict]] | None = None,
 ) -> dict:
-    """Execute the full agent pipeline with DAG-based ordering.
+    """Execute the agent pipeline, starting each agent once its dependencies finish.
+
+    Every agent runs in its own DB session. An agent whose dependency failed
+    still runs and sees the dependency's error result in the context.
+    An agent whose entry in ``previous`` was computed from the same inputs
+    (same input digest) is not run again; its previous result is reused.
+    Anything downstream of an agent that does run is invalidated only if
+    the new result differs.
 
     Args:
         paper_id: UUID of the paper being analyzed.
         paper_text: Full text of the paper.
-        db: Async database session.
-        progress_callback: Optional async callback(agent_name, status, detail).
+        progress_callback: Optional async callback(agent_name, status, detail, partial),
+            where ``partial`` carries a completed part of a running agent's result.
+        previous: Completed results of earlier runs as (input digest, result), keyed by agent name.
 
     Returns:
         Dict of all agent results keyed by agent name.
     """
+    previous = previous or {}
+    paper_hash = _hash(paper_text)
     context: dict = {}
+    timings: dict[str, tuple[float, float]] = {}
+    loop = asyncio.get_running_loop()
+    started = loop.time()
 
-    async def notify(agent: str, status: str, detail: str = ""):
+    async def notify(agent: str, status: str, detail: str = "", partial: dict | None = None):
         if progress_callback:
-            await progress_callback(agent, status, detail)
-
-    # Build RAG index first
-    await notify("rag_indexer", "running", "Building vector index...")
-    try:
-        num_chunks = build_paper_index(paper_id, paper_text)
-        await notify("rag_indexer", "completed", f"Indexed {num_chunks} chunks")
-    except Exception as e:
-        await notify("rag_indexer", "error", str(e))
-
-    # Execute pipeline stages
-    for stage_name, agent_names, deps in PIPELINE:
-        # Verify dependencies are met
-        missing_deps = [dep for dep in deps if dep not in context]
-        if missing_deps:
-            for agent_name in agent_names:
-                await notify(agent_name, "error", f"Missing dependency: {', '.join(missing_deps)}")
-            continue
-
-        if len(agent_names) == 1:
-            # Sequential execution
-            agent_name = agent_names[0]
-            agent = AGENTS[agent_name]
-            await notify(agent_name, "running", f"Executing {agent.description}...")
-            try:
-                result = await agent.run(paper_id, paper_text, context, db)
-                context[agent_name] = result
-                status = "error" if "error" in result else "completed"
-                await notify(agent_name, status, result.get("error", ""))
-            except Exception as e:
-                context[agent_name] = {"error": str(e)}
-                await notify(agent_name, "error", str(e))
-        else:
-            # Parallel execution — each agent gets its own DB session
-            async def run_agent(name: str):
-                agent = AGENTS[name]
-                await notify(name, "running", f"Executing {agent.description}...")
-                try:
-                    async with async_session() as agent_db:
-                        result = await agent.run(paper_id, paper_text, context, agent_db)
-                        await agent_db.commit()
-                    context[name] = result
-                    status = "error" if "error" in result else "completed"
-                    await notify(name, status, result.get("error", ""))
-                except Exception as e:
-                    context[name] = {"error": str(e)}
-                    await notify(name, "error", str(e))
-
-            await asyncio.gather(*[run_agent(name) for name in agent_names])
-
-    # Update paper status after pipeline
-    try:
-        stmt = select(Paper).where(Paper.id == paper_id)
-        result = await db.execute(stmt)
-        paper = result.scalar_one_or_none()
-        if paper:
-            has_errors = any("error" in v for v in context.values() if isinstance(v, dict))
-            paper.status = PaperStatus.ERROR if has_errors else PaperStatus.COMPLETED
-            await db.commit()
-    except Exception:
-        pass  # Don't fail the pipeline over a status update
+            await progress_callback(agent, status, detail, partial)
 
-    return context
+    def partial_notifier(agent: str):
+        async def on_partial(partial: dict):
+            await notify(agent, "running", f"Generated {partial['field']}", partial)
 
+        return on_partial
 
-async def stream_pipeline(
-    paper_id: str,
-    paper_text: str,
-    db: AsyncSession,
-) -> AsyncGenerator[str, None]:
-    """Run pipeline and yield SSE events for each progress update."""
-    events: asyncio.Queue = asyncio.Queue()
-
-    async def callback(agent: str, status: str, detail: str):
-        event = {"agent": agent, "status": status, "detail": detail}
-        await events.put(json.dumps(event))
-
-    async def run():
+    async def build_index():
+        await notify(RAG_INDEXER, "running", "Building vector index...")
+        begin = loop.time()
         try:
-            result = await run_pipeline(paper_id, paper_text, db, callback)
-            await events.put(json.dumps({"agent": "pipeline", "status": "completed", "detail": "All agents finished"}))
+            stats = await index_paper(paper_id, paper_text)
+            await notify(
+                RAG_INDEXER,
+                "completed",
+                f"Indexed {stats['chunks']} chunks "
+                f"(embedding cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses)",
+            )
         except Exception as e:
-            await events.put(json.dumps({"agent": "pipeline", "status": "error", "detail": str(e)}))
-        finally:
-            await events.put(None)  # Sentinel to stop streaming
-
-    # Start pipeline in background
-    task = asyncio.create_task(run())
+            await notify(RAG_INDEXER, "error", str(e))
+        timings[RAG_INDEXER] = (begin, loop.time())
+
+    async def run_agent(name: str, deps: list[asyncio.Task]):
+        await asyncio.gather(*deps)
+        digest = input_digest(name, paper_hash, context)
+        if name in previous and previous[name][0] == digest:
+            context[name] = previous[name][1]
+            # Zero-length, so the critical path still walks through to this agent's dependencies
+            now = loop.time()
+            timings[name] = (now, now)
+            _pipeline_stats["agents_reused"] += 1
+            await notify(name, "completed", REUSED)
+            return
+        _pipeline_stats["agents_run"] += 1
+        agent = AGENTS[name]
+        async with agent.slot():
+            await notify(name, "running", f"Executing {agent.description}...")
+            begin = loop.time()
+            try:
+                async with async_session() as agent_db:
+                    result = await agent.run(
+                        paper_id,
+                        paper_text,
+                        context,
+                        agent_db,
+                        on_partial=partial_notifier(name),
+                        input_digest=digest,
+                    )
+                    await agent_db.commit()
+                context[name] = result
+                status = "error" if "error" in result else "completed"
+                await notify(name, status, result.get("error", ""))
+            except Exception as e:
+                context[name] = {"error": str(e)}
+                await notify(name, "error", str(e))
+            timings[name] = (begin, loop.time())
 
-    # Yield SSE events
-    while True:
-        event = await events.get()
-        if event is None:
-            break
-        yield f"data: {event}\n\n"
+    tasks: dict[str, asyncio.Task] = {RAG_INDEXER: asyncio.create_task(build_index())}
+    for name in PIPELINE_ORDER:
+        tasks[name] = asyncio.create_task(run_agent(name, [tasks[d] for d in PIPELINE[name]]))
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+    elapsed = loop.time() - started
+    path = critical_path(PIPELINE, timings)
+    _pipeline_stats["runs"] += 1
+    _pipeline_stats["total_seconds"] += elapsed
+    _pipeline_stats["last_critical_path"] = [
+        {"agent": name, "seconds": round(timings[name][1] - timings[name][0], 2)} for name in path
+    ]
+    logger.info(
+        "Pipeline for %s finished in %.1fs; critical path: %s",
+        paper_id,
+        elapsed,
+        " -> ".join(f"{name} ({timings[name][1] - timings[name][0]:.1f}s)" for name in path),
+    )
 
-    await task
+    return context
@@ -0,0 +1,100 @@
+"""Compact, memory-mapped on-disk format for a paper's chunk texts and metadata.
+
+Layout (little-endian)::
+
+    magic      8 bytes   b"RPCHUNK1"
+    count      uint64    number of chunks (n)
+    offsets    uint64[n + 1]   byte offsets of each chunk into the blob
+    meta       n records of (page int32, start int64, end int64); page -1 = unknown
+    blob       UTF-8 text of all chunks, concatenated
+
+Readers mmap the file and decode only the chunks they are asked for, so load
+time and resident memory do not grow with the number of chunks.
+"""
+
+import contextlib
+import mmap
+import os
+import struct
+import tempfile
+import numpy as np
+
+MAGIC = b"RPCHUNK1"
+HEADER = struct.Struct("<8sQ")
+META_DTYPE = np.dtype([("page", "<i4"), ("start", "<i8"), ("end", "<i8")])
+OFFSET_DTYPE = np.dtype("<u8")
+
+
+def write_chunk_store(path: str, chunks: list[str], metadata: list[dict] | None = None):
+    """Write chunks (and optional per-chunk page/start/end) atomically to path."""
+    encoded = [c.encode("utf-8") for c in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=OFFSET_DTYPE)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    meta = np.empty(len(chunks), dtype=META_DTYPE)
+    for field in META_DTYPE.names:
+        if metadata:
+            values = [m.get(field) for m in metadata]
+            meta[field] = [v if v is not None else -1 for v in values]
+        else:
+            meta[field] = -1
+
+    # A unique temp file, so concurrent writers of the same store never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(chunks)))
+            f.write(offsets.tobytes())
+            f.write(meta.tobytes())
+            for b in encoded:
+                f.write(b)
+        # Readers holding the old file keep their mapping of the old inode
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+class ChunkStore:
+    """Read-only, memory-mapped view of a chunk store file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self._mm is None or size < HEADER.size:
+            raise ValueError(f"Truncated chunk store: {path}")
+
+        magic, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a chunk store file: {path}")
+        self.count = count
+        pos = HEADER.size
+        self.offsets = np.frombuffer(self._mm, dtype=OFFSET_DTYPE, count=count + 1, offset=pos)
+        pos += self.offsets.nbytes
+        self.meta = np.frombuffer(self._mm, dtype=META_DTYPE, count=count, offset=pos)
+        pos += self.meta.nbytes
+        self._blob_start = pos
+
+    def __len__(self) -> int:
+        return self.count
+
+    def text(self, i: int) -> str:
+        start = self._blob_start + int(self.offsets[i])
+        end = self._blob_start + int(self.offsets[i + 1])
+        return self._mm[start:end].decode("utf-8")
+
+    def metadata(self, i: int) -> dict:
+        page, start, end = (int(v) for v in self.meta[i])
+        return {
+            "page": page if page >= 0 else None,
+            "start": start if start >= 0 else None,
+            "end": end if end >= 0 else None,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the offsets and metadata arrays (the blob stays in the page cache)."""
+        return self.offsets.nbytes + self.meta.nbytes
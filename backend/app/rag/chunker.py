@@ -1,5 +1,14 @@
 """Text chunking with overlap strategy for RAG pipeline."""
 
+import re
+from bisect import bisect_right
+from collections import deque
+from typing import Iterator
+
+PAGE_MARKER = re.compile(r"--- Page (\d+) ---")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+WORD = re.compile(r"\S+")
+
 
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> list[str]:
     """Split text into overlapping chunks by word count.
@@ -28,3 +37,143 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> list[str
         start = end - overlap
 
     return chunks
+
+
+def iter_word_chunks(text: str, chunk_size: int = 500, overlap: int = 100) -> Iterator[dict]:
+    """Streaming equivalent of chunk_text that tracks character offsets.
+
+    Scans the text once with a regex and only keeps the start/end offsets of
+    the current window of words, so no word list or joined chunk copies are
+    materialized. Each chunk is a slice of the original string.
+
+    Yields:
+        Dicts with ``text``, ``start``/``end`` character offsets and ``page``
+        (from the nearest preceding ``--- Page N ---`` marker, else None).
+    """
+    markers = [(m.start(), int(m.group(1))) for m in PAGE_MARKER.finditer(text)]
+    marker_positions = [pos for pos, _ in markers]
+
+    def make(start: int, end: int) -> dict:
+        i = bisect_right(marker_positions, start) - 1
+        page = markers[i][1] if i >= 0 else None
+        return {"text": text[start:end], "start": start, "end": end, "page": page}
+
+    starts: deque[int] = deque()
+    ends: deque[int] = deque()
+    pending = False  # window holds words not yet emitted in any chunk
+    for match in WORD.finditer(text):
+        starts.append(match.start())
+        ends.append(match.end())
+        pending = True
+        if len(starts) == chunk_size:
+            yield make(starts[0], ends[-1])
+            pending = False
+            # Keep the trailing `overlap` words as the start of the next window
+            while len(starts) > overlap:
+                starts.popleft()
+                ends.popleft()
+    if pending:
+        yield make(starts[0], ends[-1])
+
+
+def _page_spans(text: str) -> list[tuple[int | None, int, int]]:
+    """Split text on ``--- Page N ---`` markers into (page, start, end) spans.
+
+    Text before the first marker (or text with no markers) has page None.
+    """
+    spans = []
+    pos, page = 0, None
+    for match in PAGE_MARKER.finditer(text):
+        if match.start() > pos:
+            spans.append((page, pos, match.start()))
+        page = int(match.group(1))
+        pos = match.end()
+    if pos < len(text):
+        spans.append((page, pos, len(text)))
+    return spans
+
+
+def _sentence_spans(text: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Return whitespace-trimmed sentence spans within text[start:end]."""
+    spans = []
+    pos = start
+    for match in SENTENCE_BREAK.finditer(text, start, end):
+        spans.append((pos, match.start()))
+        pos = match.end()
+    spans.append((pos, end))
+
+    trimmed = []
+    for s, e in spans:
+        segment = text[s:e]
+        stripped = segment.strip()
+        if stripped:
+            s += len(segment) - len(segment.lstrip())
+            trimmed.append((s, s + len(stripped)))
+    return trimmed
+
+
+def iter_token_chunks(
+    text: str,
+    tokenizer,
+    max_tokens: int = 254,
+    overlap_tokens: int = 32,
+) -> Iterator[dict]:
+    """Split text into chunks that fit the embedding model's sequence length.
+
+    Tokens are counted with the model's own (HuggingFace fast) tokenizer.
+    Chunks are packed from whole sentences and never cross a
+    ``--- Page N ---`` boundary; a single sentence longer than ``max_tokens``
+    is split on token offsets. Consecutive chunks on the same page share up to
+    ``overlap_tokens`` worth of trailing sentences. Pages are tokenized one
+    at a time as the generator is consumed.
+
+    Yields:
+        Dicts with ``text``, ``start``/``end`` character offsets into ``text``
+        and the ``page`` number (None if the text has no page markers).
+    """
+    for page, page_start, page_end in _page_spans(text):
+        sentences = _sentence_spans(text, page_start, page_end)
+        if not sentences:
+            continue
+
+        encoded = tokenizer(
+            [text[s:e] for s, e in sentences],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+        )
+
+        # Break over-long sentences into token-bounded pieces
+        pieces: list[tuple[int, int, int]] = []  # (start, end, n_tokens)
+        for (s, e), offsets in zip(sentences, encoded["offset_mapping"]):
+            if len(offsets) <= max_tokens:
+                pieces.append((s, e, len(offsets)))
+                continue
+            for i in range(0, len(offsets), max_tokens):
+                window = offsets[i:i + max_tokens]
+                pieces.append((s + window[0][0], s + window[-1][1], len(window)))
+
+        current: list[tuple[int, int, int]] = []
+        current_tokens = 0
+        for piece in pieces:
+            if current and current_tokens + piece[2] > max_tokens:
+                yield _make_chunk(text, current, page)
+                # Carry trailing pieces forward as overlap
+                carried: list[tuple[int, int, int]] = []
+                carried_tokens = 0
+                for prev in reversed(current):
+                    if carried_tokens + prev[2] > overlap_tokens:
+                        break
+                    carried.insert(0, prev)
+                    carried_tokens += prev[2]
+                if carried_tokens + piece[2] > max_tokens:
+                    carried, carried_tokens = [], 0
+                current, current_tokens = carried, carried_tokens
+            current.append(piece)
+            current_tokens += piece[2]
+        if current:
+            yield _make_chunk(text, current, page)
+
+
+def _make_chunk(text: str, pieces: list[tuple[int, int, int]], page: int | None) -> dict:
+    start, end = pieces[0][0], pieces[-1][1]
+    return {"text": text[start:end], "start": start, "end": end, "page": page}
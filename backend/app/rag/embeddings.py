@@ -1,7 +1,11 @@
 """Embedding generation using sentence-transformers."""
 
+import asyncio
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from app.config import get_settings
+from app.rag.embedding_cache import get_embedding_cache, text_hash
+from app.services.cpu_executor import run_cpu
 
 _model: SentenceTransformer | None = None
 MODEL_NAME = "all-MiniLM-L6-v2"
@@ -14,6 +18,16 @@ def _get_model() -> SentenceTransformer:
     return _model
 
 
+def get_tokenizer():
+    """Return the embedding model's own tokenizer."""
+    return _get_model().tokenizer
+
+
+def max_input_tokens() -> int:
+    """Word-pieces per input the model actually encodes, excluding [CLS]/[SEP]."""
+    return _get_model().max_seq_length - 2
+
+
 def embed_texts(texts: list[str]) -> np.ndarray:
     """Generate embeddings for a list of texts.
 
@@ -34,3 +48,132 @@ def embed_query(query: str) -> np.ndarray:
     model = _get_model()
     embedding = model.encode([query], show_progress_bar=False, convert_to_numpy=True)
     return embedding.astype("float32")
+
+
+def embed_texts_cached(texts: list[str]) -> tuple[np.ndarray, int, int]:
+    """Embed texts, reusing vectors from the persistent embedding cache.
+
+    Only texts missing from the cache are encoded, in a single batch, and the
+    new vectors are written back.
+
+    Returns:
+        (embeddings of shape (len(texts), embedding_dim), cache hits, cache misses)
+    """
+    cache = get_embedding_cache()
+    hashes = [text_hash(t) for t in texts]
+    cached = cache.get_many(MODEL_NAME, hashes)
+
+    missing: dict[str, str] = {}
+    for h, t in zip(hashes, texts):
+        if h not in cached and h not in missing:
+            missing[h] = t
+
+    if missing:
+        new_hashes = list(missing)
+        new_vectors = embed_texts(list(missing.values()))
+        cache.put_many(MODEL_NAME, new_hashes, new_vectors)
+        cached.update(zip(new_hashes, new_vectors))
+
+    embeddings = np.stack([cached[h] for h in hashes]).astype("float32")
+    hits = sum(1 for h in hashes if h not in missing)
+    return embeddings, hits, len(texts) - hits
+
+
+class EmbeddingBatcher:
+    """Dynamic micro-batcher for concurrent embedding requests.
+
+    Requests arriving within ``max_wait_ms`` of each other are encoded as one
+    ``model.encode`` call on the CPU executor, and each caller's future is
+    resolved with its own rows. A batch is flushed early once it reaches
+    ``max_batch_size`` texts.
+    """
+
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[tuple[list[str], asyncio.Future]] = []
+        self._pending_rows = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_rows += len(texts)
+        self.requests += 1
+
+        if self._pending_rows >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        if not batch:
+            return
+        task = asyncio.create_task(self._encode(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _encode(self, batch: list[tuple[list[str], asyncio.Future]]):
+        texts = [t for item_texts, _ in batch for t in item_texts]
+        self.batches += 1
+        self.rows += len(texts)
+        try:
+            vectors = await run_cpu(embed_texts, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            # Cancelled (e.g. at shutdown): don't leave callers waiting forever
+            for _, future in batch:
+                future.cancel()
+            raise
+
+        offset = 0
+        for item_texts, future in batch:
+            if not future.done():  # caller may have been cancelled
+                future.set_result(vectors[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_rows": round(self.rows / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_batcher: EmbeddingBatcher | None = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        settings = get_settings()
+        _batcher = EmbeddingBatcher(
+            max_batch_size=settings.embedding_batch_max_size,
+            max_wait_ms=settings.embedding_batch_max_wait_ms,
+        )
+    return _batcher
+
+
+async def embed_query_async(query: str) -> np.ndarray:
+    """Micro-batched, non-blocking variant of embed_query.
+
+    Returns:
+        numpy array of shape (1, embedding_dim)
+    """
+    return await get_embedding_batcher().embed([query])
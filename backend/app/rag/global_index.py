@@ -0,0 +1,346 @@
+"""Corpus-wide approximate nearest neighbour index across all papers.
+
+Every chunk vector from every per-paper ``VectorStore`` is also added to one
+HNSW or IVF index so library-wide questions can be answered without opening
+one FAISS file per paper. A SQLite table maps each global vector id to its
+(paper_id, chunk_id); the per-paper stores remain the source of truth and are
+used to rebuild the global index when needed.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import faiss
+import numpy as np
+from app.config import get_settings
+from app.rag.vector_store import VectorStore
+
+# IVF needs roughly this many training points per list to train well
+IVF_POINTS_PER_LIST = 39
+# Rebuild an HNSW index once this fraction of its vectors are stale
+MAX_DEAD_FRACTION = 0.3
+
+
+class _ReadWriteLock:
+    """Shared lock for searches, exclusive (and re-entrant) lock for index updates.
+
+    Waiting writers block new readers, so a stream of searches cannot starve
+    an update.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer: int | None = None  # owning thread id
+        self._depth = 0
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._waiting_writers -= 1
+                self._writer = me
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._depth -= 1
+                if not self._depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class GlobalIndex:
+    """Thread-safe ANN index of every chunk vector, keyed by a global int64 id.
+
+    Searches run concurrently with each other; adding, removing and
+    rebuilding take the index exclusively.
+    """
+
+    def __init__(self, root: str, index_type: str = "hnsw"):
+        if index_type not in ("hnsw", "ivf"):
+            raise ValueError(f"Unknown global index type: {index_type}")
+        self.root = root
+        self.index_type = index_type
+        self.index_path = os.path.join(root, "index.faiss")
+        self.state_path = os.path.join(root, "state.json")
+        self.db_path = os.path.join(root, "ids.sqlite")
+        self.index: faiss.Index | None = None
+        self.next_id = 0
+        self.dead = 0
+        self._unsaved = 0
+        self._lock = _ReadWriteLock()
+
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                " id INTEGER PRIMARY KEY,"
+                " paper_id TEXT NOT NULL,"
+                " chunk_id INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_vectors_paper ON vectors (paper_id)")
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30.0)
+
+    # ── Persistence ──────────────────────────────────────────────
+
+    def _load(self):
+        saved_next_id = 0
+        if os.path.exists(self.index_path) and os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("index_type") == self.index_type:
+                self.index = faiss.read_index(self.index_path)
+                saved_next_id = state.get("next_id", 0)
+                self.dead = state.get("dead", 0)
+
+        with self._connect() as conn:
+            max_id = conn.execute("SELECT MAX(id) FROM vectors").fetchone()[0]
+            # Papers added after the last save (e.g. before a crash) are re-added
+            stale = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT paper_id FROM vectors WHERE id >= ?", (saved_next_id,)
+                )
+            ]
+        self.next_id = max(saved_next_id, (max_id + 1) if max_id is not None else 0)
+
+        if self.index is None and max_id is not None:
+            self.rebuild()
+        else:
+            for paper_id in stale:
+                self.add_paper(paper_id)
+
+    def save(self):
+        with self._lock.write():
+            if self.index is None:
+                return
+            faiss.write_index(self.index, self.index_path)
+            with open(self.state_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"index_type": self.index_type, "next_id": self.next_id, "dead": self.dead}, f
+                )
+            self._unsaved = 0
+
+    # ── Index construction ───────────────────────────────────────
+
+    def _new_index(self, dim: int, n_train: int) -> faiss.Index:
+        settings = get_settings()
+        if self.index_type == "ivf":
+            nlist = max(1, min(settings.global_index_ivf_nlist, n_train // IVF_POINTS_PER_LIST))
+            quantizer = faiss.IndexFlatIP(dim)
+            return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        hnsw = faiss.IndexHNSWFlat(dim, settings.global_index_hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexIDMap2(hnsw)
+
+    def _add_vectors(self, vectors: np.ndarray, ids: np.ndarray):
+        if self.index is None:
+            self.index = self._new_index(vectors.shape[1], len(vectors))
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add_with_ids(vectors, ids)
+
+    def _needs_rebuild(self) -> bool:
+        if self.index is None or self.index.ntotal == 0:
+            return False
+        if self.index_type == "ivf":
+            # Retrain once there is enough data for the configured number of lists
+            wanted = min(
+                get_settings().global_index_ivf_nlist,
+                self.index.ntotal // IVF_POINTS_PER_LIST,
+            )
+            return self.index.nlist < wanted // 2
+        return self.dead / self.index.ntotal > MAX_DEAD_FRACTION
+
+    def add_paper(self, paper_id: str) -> int:
+        """(Re)index a paper's vectors from its per-paper store. Returns vectors added."""
+        store = VectorStore(paper_id)
+        if not store.load() or store.index.ntotal == 0:
+            self.remove_paper(paper_id)
+            return 0
+        vectors = store.index.reconstruct_n(0, store.index.ntotal)
+
+        with self._lock.write():
+            self._remove_locked(paper_id)
+            ids = np.arange(self.next_id, self.next_id + len(vectors), dtype="int64")
+            self.next_id += len(vectors)
+            self._add_vectors(vectors, ids)
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO vectors (id, paper_id, chunk_id) VALUES (?, ?, ?)",
+                    [(int(i), paper_id, chunk_id) for chunk_id, i in enumerate(ids)],
+                )
+            if self._needs_rebuild():
+                self.rebuild()
+            else:
+                self._unsaved += 1
+                if self._unsaved >= get_settings().global_index_save_every:
+                    self.save()
+        return len(vectors)
+
+    def remove_paper(self, paper_id: str):
+        with self._lock.write():
+            self._remove_locked(paper_id)
+
+    def _remove_locked(self, paper_id: str):
+        with self._connect() as conn:
+            old_ids = [
+                row[0] for row in conn.execute("SELECT id FROM vectors WHERE paper_id = ?", (paper_id,))
+            ]
+            if not old_ids:
+                return
+            conn.execute("DELETE FROM vectors WHERE paper_id = ?", (paper_id,))
+        if self.index is None:
+            return
+        if self.index_type == "ivf":
+            self.index.remove_ids(faiss.IDSelectorBatch(np.array(old_ids, dtype="int64")))
+        else:
+            # HNSW cannot delete; ids without a mapping row are skipped at search time
+            self.dead += len(old_ids)
+
+    def rebuild(self):
+        """Recreate the index from the per-paper stores, dropping stale vectors."""
+        with self._lock.write():
+            with self._connect() as conn:
+                papers = [row[0] for row in conn.execute("SELECT DISTINCT paper_id FROM vectors")]
+
+            batches: list[tuple[str, np.ndarray]] = []
+            for paper_id in papers:
+                store = VectorStore(paper_id)
+                if store.load() and store.index.ntotal:
+                    batches.append((paper_id, store.index.reconstruct_n(0, store.index.ntotal)))
+
+            rows = []
+            for paper_id, v in batches:
+                rows.extend((len(rows), paper_id, chunk_id) for chunk_id in range(len(v)))
+
+            self.index = None
+            self.dead = 0
+            self.next_id = len(rows)
+            if batches:
+                vectors = np.vstack([v for _, v in batches])
+                self.index = self._new_index(vectors.shape[1], len(vectors))
+                self.index.train(vectors)
+                self.index.add_with_ids(vectors, np.arange(len(vectors), dtype="int64"))
+
+            with self._connect() as conn:
+                conn.execute("DELETE FROM vectors")
+                conn.executemany("INSERT INTO vectors (id, paper_id, chunk_id) VALUES (?, ?, ?)", rows)
+            self.save()
+
+    # ── Search ───────────────────────────────────────────────────
+
+    def _search_params(self, selector: faiss.IDSelector | None):
+        settings = get_settings()
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=settings.global_index_nprobe)
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=settings.global_index_ef_search)
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 10,
+        paper_ids: list[str] | None = None,
+    ) -> list[dict]:
+        """Return the top_k nearest chunks as dicts with paper_id, chunk_id and score.
+
+        If ``paper_ids`` is given, only vectors from those papers are considered.
+        """
+        faiss.normalize_L2(query_embedding)
+        if paper_ids is not None and not paper_ids:
+            return []
+
+        # Searches share the lock; only updates to the index are exclusive. The
+        # id map is read under it too, so ids cannot change between the
+        # selector, the search and mapping the results back to chunks.
+        with self._lock.read():
+            if self.index is None or self.index.ntotal == 0:
+                return []
+            selector = None
+            if paper_ids is not None:
+                with self._connect() as conn:
+                    placeholders = ",".join("?" * len(paper_ids))
+                    allowed = [
+                        row[0]
+                        for row in conn.execute(
+                            f"SELECT id FROM vectors WHERE paper_id IN ({placeholders})", paper_ids
+                        )
+                    ]
+                if not allowed:
+                    return []
+                selector = faiss.IDSelectorBatch(np.array(allowed, dtype="int64"))
+
+            # Over-fetch so stale HNSW vectors can be dropped without losing results
+            k = min(self.index.ntotal, top_k * 2 if selector is None and self.dead else top_k)
+            scores, ids = self.index.search(query_embedding, k, params=self._search_params(selector))
+
+            hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+            if not hits:
+                return []
+            with self._connect() as conn:
+                placeholders = ",".join("?" * len(hits))
+                mapping = {
+                    row[0]: (row[1], row[2])
+                    for row in conn.execute(
+                        f"SELECT id, paper_id, chunk_id FROM vectors WHERE id IN ({placeholders})",
+                        [i for i, _ in hits],
+                    )
+                }
+
+        results = []
+        for vector_id, score in hits:
+            if vector_id not in mapping:
+                continue
+            paper_id, chunk_id = mapping[vector_id]
+            results.append({"paper_id": paper_id, "chunk_id": chunk_id, "score": score})
+            if len(results) == top_k:
+                break
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "type": self.index_type,
+            "vectors": self.index.ntotal if self.index is not None else 0,
+            "dead": self.dead,
+        }
+
+
+_global_index: GlobalIndex | None = None
+_global_index_lock = threading.Lock()
+
+
+def get_global_index() -> GlobalIndex:
+    global _global_index
+    with _global_index_lock:
+        if _global_index is None:
+            settings = get_settings()
+            _global_index = GlobalIndex(
+                os.path.join(settings.vector_store_dir, "_global"),
+                index_type=settings.global_index_type,
+            )
+    return _global_index
@@ -0,0 +1,133 @@
+"""Per-paper inverted index with precomputed BM25 impact scores.
+
+Postings are stored CSR-style in flat numpy arrays: for vocabulary term t,
+``doc_ids[term_offsets[t]:term_offsets[t + 1]]`` are the chunks containing it
+and ``impacts`` holds the matching precomputed BM25 term weights, so scoring
+a query is a handful of vectorised adds with no per-query statistics.
+"""
+
+import re
+import numpy as np
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+# Tokens that look like identifiers: acronyms, names with digits, hyphenated labels
+IDENTIFIER = re.compile(r"^(?=.*(?:\d|[A-Z].*[A-Z]|[-_.]\w))\S+$")
+# Abbreviated references followed by a number ("Eq. 3", "Fig. 2b"), joined into one identifier
+ABBREVIATION = re.compile(r"\b([A-Z][a-z]{0,4}\.)\s+(?=\d)")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(text.lower())
+
+
+def is_lexical_query(query: str) -> bool:
+    """True for exact-lookup queries (quoted, or only identifier-like terms).
+
+    Such queries, e.g. ``"ImageNet-1k"``, ``BLEU F1`` or ``Eq. 3``, are best
+    answered by term matching and do not need the embedding model.
+    """
+    stripped = query.strip()
+    if len(stripped) > 2 and stripped[0] == stripped[-1] and stripped[0] in "\"'":
+        return True
+    words = ABBREVIATION.sub(r"\1", stripped).split()
+    return 0 < len(words) <= 3 and all(IDENTIFIER.match(w) for w in words)
+
+
+class LexicalIndex:
+    """Immutable BM25 index over one paper's chunks."""
+
+    def __init__(
+        self,
+        vocab: list[str],
+        term_offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        impacts: np.ndarray,
+        num_docs: int,
+    ):
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.term_offsets = term_offsets
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.num_docs = num_docs
+
+    @classmethod
+    def build(cls, chunks: list[str]) -> "LexicalIndex":
+        postings: dict[str, dict[int, int]] = {}
+        doc_lens = np.zeros(len(chunks), dtype="float32")
+        for doc_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            doc_lens[doc_id] = len(tokens)
+            for token in tokens:
+                tf = postings.setdefault(token, {})
+                tf[doc_id] = tf.get(doc_id, 0) + 1
+
+        vocab = sorted(postings)
+        avgdl = float(doc_lens.mean()) if len(chunks) else 0.0
+        term_offsets = np.zeros(len(vocab) + 1, dtype="uint32")
+        doc_id_parts, impact_parts = [], []
+        for t, term in enumerate(vocab):
+            docs = np.fromiter(postings[term].keys(), dtype="uint32")
+            tfs = np.fromiter(postings[term].values(), dtype="float32")
+            idf = np.log(1 + (len(chunks) - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lens[docs] / (avgdl or 1.0))
+            doc_id_parts.append(docs)
+            impact_parts.append((idf * tfs * (BM25_K1 + 1) / (tfs + norm)).astype("float32"))
+            term_offsets[t + 1] = term_offsets[t] + len(docs)
+
+        empty_ids, empty_impacts = np.zeros(0, "uint32"), np.zeros(0, "float32")
+        return cls(
+            vocab,
+            term_offsets,
+            np.concatenate(doc_id_parts) if doc_id_parts else empty_ids,
+            np.concatenate(impact_parts) if impact_parts else empty_impacts,
+            len(chunks),
+        )
+
+    def save(self, path: str):
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                vocab=np.frombuffer("\n".join(vocab).encode("utf-8"), dtype="uint8"),
+                term_offsets=self.term_offsets,
+                doc_ids=self.doc_ids,
+                impacts=self.impacts,
+                num_docs=np.array([self.num_docs], dtype="uint32"),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with np.load(path) as data:
+            raw_vocab = data["vocab"].tobytes().decode("utf-8")
+            return cls(
+                raw_vocab.split("\n") if raw_vocab else [],
+                data["term_offsets"],
+                data["doc_ids"],
+                data["impacts"],
+                int(data["num_docs"][0]),
+            )
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[int, float]]:
+        """Return up to top_k (chunk_id, bm25_score) pairs, best first."""
+        scores = np.zeros(self.num_docs, dtype="float32")
+        matched = False
+        for token in set(tokenize(query)):
+            t = self.vocab.get(token)
+            if t is None:
+                continue
+            start, end = self.term_offsets[t], self.term_offsets[t + 1]
+            scores[self.doc_ids[start:end]] += self.impacts[start:end]
+            matched = True
+        if not matched:
+            return []
+
+        k = min(top_k, int(np.count_nonzero(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    @property
+    def nbytes(self) -> int:
+        return self.term_offsets.nbytes + self.doc_ids.nbytes + self.impacts.nbytes
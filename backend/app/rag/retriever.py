@@ -1,27 +1,141 @@
 """High-level RAG retriever combining embeddings and vector store."""
 
-from app.rag.embeddings import embed_texts, embed_query
-from app.rag.chunker import chunk_text
-from app.rag.vector_store import VectorStore
+import asyncio
+from itertools import islice
+import numpy as np
+from app.config import get_settings
+from app.rag.embeddings import embed_texts_cached, embed_query_async, get_tokenizer, max_input_tokens
+from app.rag.chunker import iter_token_chunks, iter_word_chunks
+from app.rag.vector_store import VectorStore, get_store_cache, read_chunks
+from app.rag.global_index import get_global_index
+from app.rag.lexical_index import is_lexical_query
+from app.services.cpu_executor import run_cpu
 
+EMBED_BATCH_SIZE = 64
+
+
+def build_paper_index(paper_id: str, text: str) -> dict:
+    """Build vector index for a paper's text.
+
+    Chunks are streamed from the chunker and embedded in batches of
+    EMBED_BATCH_SIZE, so the full set of chunk dicts is never held at once.
+
+    Returns:
+        Dict with the number of chunks and embedding cache hits/misses.
+    """
+    settings = get_settings()
+    if settings.chunking_mode == "tokens":
+        chunk_iter = iter_token_chunks(
+            text,
+            get_tokenizer(),
+            max_tokens=max_input_tokens(),
+            overlap_tokens=settings.chunk_overlap_tokens,
+        )
+    else:
+        chunk_iter = iter_word_chunks(text)
+
+    chunks: list[str] = []
+    metadata: list[dict] = []
+    vectors: list[np.ndarray] = []
+    hits = misses = 0
+    while batch := list(islice(chunk_iter, EMBED_BATCH_SIZE)):
+        texts = [c["text"] for c in batch]
+        embeddings, batch_hits, batch_misses = embed_texts_cached(texts)
+        chunks.extend(texts)
+        metadata.extend({"page": c["page"], "start": c["start"], "end": c["end"]} for c in batch)
+        vectors.append(embeddings)
+        hits += batch_hits
+        misses += batch_misses
 
-def build_paper_index(paper_id: str, text: str) -> int:
-    """Build vector index for a paper's text. Returns number of chunks."""
-    chunks = chunk_text(text)
     if not chunks:
-        return 0
+        return {"chunks": 0, "cache_hits": 0, "cache_misses": 0}
 
-    embeddings = embed_texts(chunks)
     store = VectorStore(paper_id)
-    store.build(chunks, embeddings)
-    return len(chunks)
+    store.build(chunks, np.vstack(vectors), metadata)
+    return {"chunks": len(chunks), "cache_hits": hits, "cache_misses": misses}
 
 
-def retrieve_chunks(paper_id: str, query: str, top_k: int = 5) -> list[str]:
-    """Retrieve the most relevant chunks for a query from a paper's index."""
-    store = VectorStore(paper_id)
-    if not store.exists:
+async def index_paper(paper_id: str, text: str) -> dict:
+    """Build a paper's index on the CPU executor and publish it to the global index.
+
+    The global index and loaded-store cache live in this process, so they are
+    updated here rather than inside build_paper_index, which may run in a
+    worker process.
+    """
+    stats = await run_cpu(build_paper_index, paper_id, text)
+    get_store_cache().invalidate(paper_id)
+    await asyncio.to_thread(get_global_index().add_paper, paper_id)
+    return stats
+
+
+async def search_corpus(
+    query: str,
+    top_k: int = 10,
+    paper_ids: list[str] | None = None,
+) -> list[dict]:
+    """Semantic search across every indexed paper (optionally restricted to paper_ids).
+
+    Returns:
+        Ranked dicts with paper_id, chunk_id, score, text and page/offsets.
+    """
+    query_emb = await embed_query_async(query)
+    hits = await asyncio.to_thread(get_global_index().search, query_emb, top_k, paper_ids)
+
+    chunks = await asyncio.to_thread(read_chunks, [(hit["paper_id"], hit["chunk_id"]) for hit in hits])
+    return [{**hit, **chunk} for hit, chunk in zip(hits, chunks) if chunk is not None]
+
+
+def reciprocal_rank_fusion(rankings: list[list[dict]], top_k: int, k: int = 60) -> list[dict]:
+    """Fuse ranked hit lists by summing 1 / (k + rank) per chunk_id."""
+    fused: dict[int, dict] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            entry = fused.setdefault(hit["chunk_id"], {**hit, "score": 0.0})
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda h: h["score"], reverse=True)[:top_k]
+
+
+async def retrieve_chunk_hits(
+    paper_id: str,
+    query: str,
+    top_k: int = 5,
+    mode: str | None = None,
+) -> list[dict]:
+    """Retrieve the most relevant chunks with their score and page location.
+
+    ``mode`` is "dense", "lexical" or "hybrid" (default: RETRIEVAL_MODE).
+    Hybrid fuses BM25 and dense rankings with reciprocal rank fusion, but
+    exact-lookup queries (quoted strings, acronyms, labels with digits) that
+    match lexically are answered from the inverted index alone, without
+    calling the embedding model.
+
+    Queries are embedded through the micro-batching embedding service; the
+    index lookups stay in-process so they are served from the loaded-store
+    cache.
+    """
+    settings = get_settings()
+    mode = mode or settings.retrieval_mode
+    store = VectorStore.open(paper_id)
+    if store is None:
         return []
 
-    query_emb = embed_query(query)
-    return store.search(query_emb, top_k=top_k)
+    if mode == "lexical":
+        return store.lexical_search(query, top_k=top_k)
+
+    if mode == "hybrid":
+        # Over-fetch each side so fusion has candidates to reorder
+        depth = max(top_k * 4, 20)
+        lexical_hits = store.lexical_search(query, top_k=depth)
+        if lexical_hits and is_lexical_query(query):
+            return lexical_hits[:top_k]
+        query_emb = await embed_query_async(query)
+        dense_hits = store.search_with_metadata(query_emb, top_k=depth)
+        return reciprocal_rank_fusion([dense_hits, lexical_hits], top_k, k=settings.rrf_k)
+
+    query_emb = await embed_query_async(query)
+    return store.search_with_metadata(query_emb, top_k=top_k)
+
+
+async def retrieve_chunks(paper_id: str, query: str, top_k: int = 5) -> list[str]:
+    """Retrieve the most relevant chunks for a query from a paper's index."""
+    return [hit["text"] for hit in await retrieve_chunk_hits(paper_id, query, top_k)]
@@ -1,10 +1,52 @@
 """FAISS-based vector store for per-paper chunk storage and retrieval."""
 
+import contextlib
 import os
 import json
 import faiss
 import numpy as np
 from app.config import get_settings
+from app.rag.store_cache import StoreCache
+from app.rag.chunk_store import ChunkStore, write_chunk_store
+from app.rag.lexical_index import LexicalIndex
+from app.rag.embeddings import MODEL_NAME
+
+INDEX_TYPES = ("flat", "sq16", "sq8", "pq")
+# PQ with fewer bits per code than this is not worth it; use SQ8 instead
+MIN_PQ_BITS = 4
+
+_cache: StoreCache | None = None
+
+
+def get_store_cache() -> StoreCache:
+    """Return the process-wide cache of loaded vector stores."""
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = StoreCache(
+            max_entries=settings.vector_cache_max_entries,
+            max_bytes=settings.vector_cache_max_mb * 1024 * 1024,
+        )
+    return _cache
+
+
+def _make_index(dim: int, num_vectors: int, index_type: str) -> tuple[faiss.Index, str]:
+    """Create an untrained inner-product index of the requested type.
+
+    Returns the index and the type actually used: PQ needs at least
+    2**nbits training points and a sub-quantizer count that divides ``dim``,
+    so small papers fall back to SQ8.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {index_type}")
+    if index_type == "pq":
+        m = get_settings().vector_index_pq_m
+        nbits = min(8, max(num_vectors, 1).bit_length() - 1)
+        if dim % m == 0 and nbits >= MIN_PQ_BITS:
+            return faiss.index_factory(dim, f"PQ{m}x{nbits}", faiss.METRIC_INNER_PRODUCT), "pq"
+        index_type = "sq8"
+    factory = {"flat": "Flat", "sq16": "SQfp16", "sq8": "SQ8"}[index_type]
+    return faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT), index_type
 
 
 class VectorStore:
@@ -14,50 +56,202 @@ class VectorStore:
         self.paper_id = paper_id
         self.store_dir = os.path.join(get_settings().vector_store_dir, paper_id)
         self.index_path = os.path.join(self.store_dir, "index.faiss")
-        self.chunks_path = os.path.join(self.store_dir, "chunks.json")
-        self.index: faiss.IndexFlatIP | None = None
-        self.chunks: list[str] = []
+        self.info_path = os.path.join(self.store_dir, "store.json")
+        self.lexical_path = os.path.join(self.store_dir, "lexical.npz")
+        self.chunks_path = os.path.join(self.store_dir, "chunks.bin")
+        # Legacy JSON files, migrated to chunks.bin on first load
+        self.legacy_chunks_path = os.path.join(self.store_dir, "chunks.json")
+        self.legacy_meta_path = os.path.join(self.store_dir, "chunks_meta.json")
+        self.index: faiss.Index | None = None
+        self.chunks: ChunkStore | None = None
+        self.lexical: LexicalIndex | None = None
+        self.info: dict = {}
+
+    @classmethod
+    def open(cls, paper_id: str) -> "VectorStore | None":
+        """Return a loaded store for paper_id, served from the LRU cache when possible."""
+        cache = get_store_cache()
+        store = cache.get(paper_id)
+        if store is not None:
+            return store
+        store = cls(paper_id)
+        if not store.load():
+            return None
+        cache.put(paper_id, store, store.nbytes)
+        return store
 
-    def build(self, chunks: list[str], embeddings: np.ndarray):
-        """Build and persist a FAISS index from chunks and their embeddings."""
+    def build(self, chunks: list[str], embeddings: np.ndarray, metadata: list[dict] | None = None):
+        """Build and persist a FAISS index from chunks and their embeddings.
+
+        ``metadata`` optionally holds one dict per chunk (page, start, end).
+        """
         os.makedirs(self.store_dir, exist_ok=True)
 
         # Normalize embeddings for cosine similarity via inner product
         faiss.normalize_L2(embeddings)
         dim = embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dim)
+        self.index, index_type = _make_index(dim, len(embeddings), get_settings().vector_index_type)
+        if not self.index.is_trained:
+            self.index.train(embeddings)
         self.index.add(embeddings)
-        self.chunks = chunks
+        self.info = {
+            "index_type": index_type,
+            "embedding_model": MODEL_NAME,
+            "dim": dim,
+            "count": len(chunks),
+        }
+
+        # Save to disk; store.json is written last so readers never see
+        # metadata describing an index that is not there yet
+        # Write-then-rename: another reader may still be reading the old index
+        faiss.write_index(self.index, f"{self.index_path}.tmp")
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        write_chunk_store(self.chunks_path, chunks, metadata)
+        self._remove_legacy_files()
+        self.lexical = LexicalIndex.build(chunks)
+        self.lexical.save(f"{self.lexical_path}.tmp")
+        os.replace(f"{self.lexical_path}.tmp", self.lexical_path)
+        with open(self.info_path, "w", encoding="utf-8") as f:
+            json.dump(self.info, f)
+        self.chunks = ChunkStore(self.chunks_path)
 
-        # Save to disk
-        faiss.write_index(self.index, self.index_path)
-        with open(self.chunks_path, "w", encoding="utf-8") as f:
-            json.dump(chunks, f, ensure_ascii=False)
+        # Any cached copy is now stale
+        get_store_cache().invalidate(self.paper_id)
 
     def load(self) -> bool:
-        """Load a previously saved index. Returns True if successful."""
-        if not os.path.exists(self.index_path) or not os.path.exists(self.chunks_path):
+        """Load a previously saved index. Returns True if successful.
+
+        Stores built with a different embedding model are treated as absent,
+        since their vectors are not comparable with current query embeddings.
+        """
+        if not os.path.exists(self.index_path):
+            return False
+        if not os.path.exists(self.chunks_path) and not self._migrate_legacy_chunks():
             return False
+
+        # Stores from before store.json existed are float32 flat indexes
+        self.info = {"index_type": "flat", "embedding_model": MODEL_NAME}
+        if os.path.exists(self.info_path):
+            with open(self.info_path, "r", encoding="utf-8") as f:
+                self.info.update(json.load(f))
+        if self.info["embedding_model"] != MODEL_NAME:
+            return False
+
         self.index = faiss.read_index(self.index_path)
-        with open(self.chunks_path, "r", encoding="utf-8") as f:
-            self.chunks = json.load(f)
+        self.chunks = ChunkStore(self.chunks_path)
+        # Stores built before hybrid retrieval have no lexical index
+        if os.path.exists(self.lexical_path):
+            self.lexical = LexicalIndex.load(self.lexical_path)
+        return True
+
+    def _migrate_legacy_chunks(self) -> bool:
+        """Convert a chunks.json (+ chunks_meta.json) store to chunks.bin.
+
+        Several threads may migrate the same store at once; a legacy file that
+        has disappeared means another one finished first.
+        """
+        try:
+            with open(self.legacy_chunks_path, "r", encoding="utf-8") as f:
+                chunks = json.load(f)
+        except FileNotFoundError:
+            return os.path.exists(self.chunks_path)
+        metadata = None
+        try:
+            with open(self.legacy_meta_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            if os.path.exists(self.chunks_path):
+                return True  # migrated meanwhile; its metadata went with it
+        write_chunk_store(self.chunks_path, chunks, metadata)
+        self._remove_legacy_files()
         return True
 
+    def _remove_legacy_files(self):
+        for path in (self.legacy_chunks_path, self.legacy_meta_path):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def get_chunk(self, chunk_id: int) -> dict:
+        """Return one chunk's text with its page/offsets, decoding nothing else."""
+        return {"text": self.chunks.text(chunk_id), **self.chunks.metadata(chunk_id)}
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.chunks) if self.chunks is not None else 0
+
     def search(self, query_embedding: np.ndarray, top_k: int = 5) -> list[str]:
         """Search for the top_k most similar chunks to the query embedding."""
+        return [hit["text"] for hit in self.search_with_metadata(query_embedding, top_k)]
+
+    def search_with_metadata(self, query_embedding: np.ndarray, top_k: int = 5) -> list[dict]:
+        """Like search, but return dicts with text, score, chunk_id and page/offsets."""
         if self.index is None:
             if not self.load():
                 return []
+        if self.num_chunks == 0:
+            return []
 
         faiss.normalize_L2(query_embedding)
-        scores, indices = self.index.search(query_embedding, min(top_k, len(self.chunks)))
+        scores, indices = self.index.search(query_embedding, min(top_k, self.num_chunks))
 
         results = []
-        for idx in indices[0]:
-            if 0 <= idx < len(self.chunks):
-                results.append(self.chunks[idx])
+        for score, idx in zip(scores[0], indices[0]):
+            if 0 <= idx < self.num_chunks:
+                results.append({"chunk_id": int(idx), "score": float(score), **self.get_chunk(int(idx))})
         return results
 
+    def lexical_search(self, query: str, top_k: int = 5) -> list[dict]:
+        """BM25 search over the paper's inverted index; no embedding needed."""
+        if self.index is None:
+            if not self.load():
+                return []
+        if self.lexical is None:
+            return []
+        return [
+            {"chunk_id": chunk_id, "score": score, **self.get_chunk(chunk_id)}
+            for chunk_id, score in self.lexical.search(query, top_k)
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate heap size of the loaded index and chunk offset tables."""
+        index_bytes = self.index.ntotal * self.index.sa_code_size() if self.index is not None else 0
+        return (
+            index_bytes
+            + (self.chunks.nbytes if self.chunks is not None else 0)
+            + (self.lexical.nbytes if self.lexical is not None else 0)
+        )
+
     @property
     def exists(self) -> bool:
         return os.path.exists(self.index_path)
+
+
+def read_chunks(refs: list[tuple[str, int]]) -> list[dict | None]:
+    """Text and page/offsets of (paper_id, chunk_id) pairs; None where a chunk is gone.
+
+    Stores already in the cache are read from; otherwise only the paper's
+    chunk store file is opened, so looking up a few chunks across many papers
+    does not load (or cache) their indexes.
+    """
+    cache = get_store_cache()
+    chunk_stores: dict[str, ChunkStore | None] = {}
+    results = []
+    for paper_id, chunk_id in refs:
+        if paper_id not in chunk_stores:
+            store = cache.peek(paper_id)
+            if store is not None:
+                chunk_stores[paper_id] = store.chunks
+            else:
+                store = VectorStore(paper_id)
+                if os.path.exists(store.chunks_path):
+                    chunk_stores[paper_id] = ChunkStore(store.chunks_path)
+                else:
+                    # Legacy JSON chunks; loading migrates them
+                    chunk_stores[paper_id] = store.chunks if store.load() else None
+        chunks = chunk_stores[paper_id]
+        if chunks is None or chunk_id >= len(chunks):
+            results.append(None)
+        else:
+            results.append({"text": chunks.text(chunk_id), **chunks.metadata(chunk_id)})
+    return results
@@ -0,0 +1,80 @@
+"""API routes for bulk analysis of many papers."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from app.database import get_db
+from app.models import Paper, Workspace, WorkspacePaper
+from app.routers.papers import SSE_HEADERS
+from app.services.job_queue import get_job_queue, stream_batch
+
+router = APIRouter(prefix="/api/batches", tags=["batches"])
+
+
+class BulkAnalyzeRequest(BaseModel):
+    paper_ids: list[str] = []
+    workspace_id: str | None = None
+    mode: str = "full"  # "full" or "incremental", as for a single analysis
+
+
+@router.post("")
+async def create_batch(request: BulkAnalyzeRequest, db: AsyncSession = Depends(get_db)):
+    """Queue analyses of a list of papers and/or every paper in a workspace.
+
+    Papers are analysed by the background job workers, at most JOB_WORKERS
+    (and JOB_BULK_MAX_IN_FLIGHT) at a time, with their LLM calls going
+    through the shared per-model limits; single-paper analyses requested
+    meanwhile are picked up first. Papers already being analysed are joined
+    rather than queued twice.
+    """
+    if request.mode not in ("full", "incremental"):
+        raise HTTPException(status_code=400, detail="mode must be 'full' or 'incremental'")
+
+    paper_ids = list(request.paper_ids)
+    if request.workspace_id:
+        workspace = await db.get(Workspace, request.workspace_id)
+        if not workspace:
+            raise HTTPException(status_code=404, detail="Workspace not found")
+        result = await db.execute(
+            select(WorkspacePaper.paper_id).where(WorkspacePaper.workspace_id == request.workspace_id)
+        )
+        paper_ids += [row[0] for row in result.fetchall()]
+    paper_ids = list(dict.fromkeys(paper_ids))
+    if not paper_ids:
+        raise HTTPException(status_code=400, detail="No papers to analyze")
+
+    result = await db.execute(
+        select(Paper.id, func.coalesce(func.length(Paper.raw_text), 0)).where(Paper.id.in_(paper_ids))
+    )
+    has_text = {paper_id: length > 0 for paper_id, length in result.all()}
+    skipped = []
+    for paper_id in paper_ids:
+        if paper_id not in has_text:
+            skipped.append({"paper_id": paper_id, "reason": "Paper not found"})
+        elif not has_text[paper_id]:
+            skipped.append({"paper_id": paper_id, "reason": "Paper has no text to analyze"})
+    queued = [paper_id for paper_id in paper_ids if has_text.get(paper_id)]
+    if not queued:
+        raise HTTPException(status_code=400, detail={"message": "No analyzable papers", "skipped": skipped})
+
+    batch = await get_job_queue().enqueue_batch(queued, request.mode, request.workspace_id)
+    return {"batch_id": batch.id, "queued": len(queued), "skipped": skipped}
+
+
+@router.get("/{batch_id}")
+async def get_batch(batch_id: str):
+    """Aggregate progress of a bulk analysis: job counts, throughput and ETA."""
+    progress = await get_job_queue().batch_progress(batch_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return progress
+
+
+@router.get("/{batch_id}/events")
+async def batch_events(batch_id: str):
+    """Stream a bulk analysis' aggregate progress via SSE until every paper is done."""
+    if await get_job_queue().batch_progress(batch_id) is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return StreamingResponse(stream_batch(batch_id), media_type="text/event-stream", headers=SSE_HEADERS)
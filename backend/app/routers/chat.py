@@ -1,12 +1,14 @@
 """API routes for paper Q&A chat."""
 
+import json
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_db, async_session
 from app.models import Paper
-from app.services.qa_service import ask_question, get_chat_history
+from app.services.qa_service import ask_question, ask_question_stream, get_chat_history
 
 router = APIRouter(prefix="/api/papers", tags=["chat"])
 
@@ -39,6 +41,50 @@ async def chat_with_paper(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/{paper_id}/chat/stream")
+async def chat_with_paper_stream(
+    paper_id: str,
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Ask a question about a paper and stream the answer via SSE.
+
+    Emits ``{"type": "token", "content": ...}`` events as text arrives, then a
+    single ``{"type": "done", "answer": ...}`` or ``{"type": "error", "detail": ...}``.
+    """
+    stmt = select(Paper).where(Paper.id == paper_id)
+    result = await db.execute(stmt)
+    paper = result.scalar_one_or_none()
+    if not paper:
+        raise HTTPException(status_code=404, detail="Paper not found")
+
+    if not paper.raw_text:
+        raise HTTPException(status_code=400, detail="Paper has no text to analyze")
+
+    async def event_stream():
+        # The request-scoped session is closed before the body is streamed
+        async with async_session() as stream_db:
+            parts = []
+            try:
+                async for delta in ask_question_stream(paper_id, request.question, stream_db):
+                    parts.append(delta)
+                    yield f"data: {json.dumps({'type': 'token', 'content': delta})}\n\n"
+            except Exception as e:
+                yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+                return
+            yield f"data: {json.dumps({'type': 'done', 'answer': ''.join(parts)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 @router.get("/{paper_id}/chat/history")
 async def get_history(paper_id: str, db: AsyncSession = Depends(get_db)):
     """Get chat history for a paper."""
@@ -3,19 +3,26 @@
 import json
 from collections import defaultdict
 import os
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select
 from app.database import get_db
 from app.models import Paper, Analysis, PaperStatus, SourceType
 from app.services.pdf_parser import extract_text_from_bytes
+from app.services.cpu_executor import run_cpu
 from app.services.arxiv_client import extract_arxiv_id, fetch_paper_metadata, download_pdf
-from app.orchestrator import stream_pipeline
+from app.services.job_queue import JobConflict, get_job_queue, job_dict, stream_progress
 from app.config import get_settings
 
 router = APIRouter(prefix="/api/papers", tags=["papers"])
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
 
 @router.get("/recent-graphs")
 async def recent_knowledge_graphs(db: AsyncSession = Depends(get_db)):
@@ -58,7 +65,7 @@ async def upload_paper(
     if file and file.filename:
         # Handle PDF upload
         contents = await file.read()
-        raw_text = extract_text_from_bytes(contents)
+        raw_text = await run_cpu(extract_text_from_bytes, contents)
 
         # Save file to disk
         settings = get_settings()
@@ -85,7 +92,7 @@ async def upload_paper(
         if arxiv_id:
             metadata = await fetch_paper_metadata(arxiv_id)
             pdf_bytes = await download_pdf(arxiv_id)
-            raw_text = extract_text_from_bytes(pdf_bytes)
+            raw_text = await run_cpu(extract_text_from_bytes, pdf_bytes)
 
             paper = Paper(
                 title=metadata["title"],
@@ -280,8 +287,24 @@ async def get_peer_review(paper_id: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/{paper_id}/analyze")
-async def analyze_paper(paper_id: str, db: AsyncSession = Depends(get_db)):
-    """Start analysis pipeline and stream progress via SSE."""
+async def analyze_paper(
+    paper_id: str,
+    mode: str = "full",
+    db: AsyncSession = Depends(get_db),
+    last_event_id: str | None = Header(None),
+):
+    """Queue an analysis (or join the one in progress) and stream its progress via SSE.
+
+    ``mode=incremental`` reruns only agents whose inputs (paper text, agent
+    code and prompts, upstream results) changed since their last completed
+    run, plus whatever depends on them; ``mode=full`` reruns everything.
+    A reconnecting EventSource sends Last-Event-ID; it resumes the stream
+    after that event and never starts a new analysis. An analysis already
+    in progress in the other mode is a 409 conflict.
+    """
+    if mode not in ("full", "incremental"):
+        raise HTTPException(status_code=400, detail="mode must be 'full' or 'incremental'")
+
     stmt = select(Paper).where(Paper.id == paper_id)
     result = await db.execute(stmt)
     paper = result.scalar_one_or_none()
@@ -291,19 +314,40 @@ async def analyze_paper(paper_id: str, db: AsyncSession = Depends(get_db)):
     if not paper.raw_text:
         raise HTTPException(status_code=400, detail="Paper has no text to analyze")
 
-    # Delete old analyses to start fresh
-    await db.execute(delete(Analysis).where(Analysis.paper_id == paper_id))
+    if not last_event_id:
+        try:
+            await get_job_queue().enqueue(paper_id, mode)
+        except JobConflict as e:
+            raise HTTPException(status_code=409, detail={"message": str(e), "job": job_dict(e.job)})
 
-    # Update paper status
-    paper.status = PaperStatus.PROCESSING
-    await db.commit()
+    return StreamingResponse(
+        stream_progress(paper_id, last_event_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
+
+@router.get("/{paper_id}/events")
+async def paper_events(
+    paper_id: str,
+    db: AsyncSession = Depends(get_db),
+    last_event_id: str | None = Header(None),
+):
+    """Stream progress of the paper's current (or last) analysis without starting one."""
+    paper = await db.get(Paper, paper_id)
+    if not paper:
+        raise HTTPException(status_code=404, detail="Paper not found")
     return StreamingResponse(
-        stream_pipeline(paper_id, paper.raw_text, db),
+        stream_progress(paper_id, last_event_id),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+        headers=SSE_HEADERS,
     )
+
+
+@router.get("/{paper_id}/job")
+async def get_analysis_job(paper_id: str):
+    """Status of the paper's most recent analysis job."""
+    job = await get_job_queue().latest_job(paper_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No analysis job for this paper")
+    return job_dict(job)
@@ -0,0 +1,59 @@
+"""API routes for library-wide semantic search."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.database import get_db
+from app.models import Paper, Workspace, WorkspacePaper
+from app.rag.retriever import search_corpus
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("/semantic")
+async def semantic_search(
+    q: str = "",
+    top_k: int = 10,
+    paper_id: str | None = None,
+    workspace_id: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Search chunks across all indexed papers, optionally within one paper or workspace."""
+    if not q.strip():
+        return []
+    top_k = max(1, min(top_k, 100))
+
+    paper_ids = None
+    if workspace_id:
+        ws_result = await db.execute(select(Workspace).where(Workspace.id == workspace_id))
+        if not ws_result.scalar_one_or_none():
+            raise HTTPException(status_code=404, detail="Workspace not found")
+        result = await db.execute(
+            select(WorkspacePaper.paper_id).where(WorkspacePaper.workspace_id == workspace_id)
+        )
+        paper_ids = [row[0] for row in result.fetchall()]
+    if paper_id:
+        paper_ids = [paper_id] if paper_ids is None or paper_id in paper_ids else []
+
+    hits = await search_corpus(q.strip(), top_k=top_k, paper_ids=paper_ids)
+    if not hits:
+        return []
+
+    result = await db.execute(
+        select(Paper.id, Paper.title).where(Paper.id.in_({h["paper_id"] for h in hits}))
+    )
+    titles = dict(result.fetchall())
+
+    return [
+        {
+            "paper_id": h["paper_id"],
+            "paper_title": titles.get(h["paper_id"], "Untitled Paper"),
+            "chunk_id": h["chunk_id"],
+            "score": h["score"],
+            "text": h["text"],
+            "page": h["page"],
+            "start": h["start"],
+            "end": h["end"],
+        }
+        for h in hits
+    ]
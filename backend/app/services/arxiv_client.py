@@ -3,12 +3,15 @@
 import httpx
 import re
 import xml.etree.ElementTree as ET
+from app.services.single_flight import SingleFlight, single_flight
 
 ARXIV_API_BASE = "https://export.arxiv.org/api/query"
 ARXIV_PDF_BASE = "https://arxiv.org/pdf/"
 
 ATOM_NS = "{http://www.w3.org/2005/Atom}"
 
+_flight = SingleFlight("arxiv", copy_results=True)
+
 
 def extract_arxiv_id(input_str: str) -> str | None:
     """Extract arXiv ID from a URL or plain ID string."""
@@ -24,6 +27,7 @@ def extract_arxiv_id(input_str: str) -> str | None:
     return None
 
 
+@single_flight(_flight)
 async def fetch_paper_metadata(arxiv_id: str) -> dict:
     """Fetch paper metadata from arXiv Atom feed."""
     async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
@@ -50,6 +54,7 @@ async def fetch_paper_metadata(arxiv_id: str) -> dict:
     }
 
 
+@single_flight(_flight)
 async def download_pdf(arxiv_id: str) -> bytes:
     """Download PDF bytes for an arXiv paper."""
     url = f"{ARXIV_PDF_BASE}{arxiv_id}.pdf"
@@ -59,6 +64,7 @@ async def download_pdf(arxiv_id: str) -> bytes:
         return resp.content
 
 
+@single_flight(_flight)
 async def search_papers(query: str, max_results: int = 10) -> list[dict]:
     """Search arXiv for papers matching query."""
     async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
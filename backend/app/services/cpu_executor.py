@@ -0,0 +1,112 @@
+"""Bounded worker pool for CPU-bound work (PDF parsing, chunking, embedding).
+
+Blocking calls are dispatched here so they never run on the event loop and
+stall other requests or SSE streams in the same uvicorn worker.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+from app.config import get_settings
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> tuple[float, Any]:
+    """Run fn in the worker and report when it actually started.
+
+    Module-level so it can be pickled for the process pool.
+    """
+    started = time.time()
+    return started, fn(*args, **kwargs)
+
+
+class CPUExecutor:
+    """Thread or process pool with a bounded admission queue and wait-time metrics.
+
+    At most ``max_workers + max_queue`` calls are admitted at once; further
+    callers wait for a slot, which applies backpressure instead of letting the
+    pool's internal queue grow without bound.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown CPU executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: Executor | None = None
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="cpu-worker"
+                )
+        return self._pool
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the pool and await its result."""
+        submitted = time.time()
+        self._in_flight += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._get_pool(), _timed_call, fn, args, kwargs)
+                started, result = await future
+        except BaseException:
+            self._in_flight -= 1
+            self.failed += 1
+            raise
+        self._in_flight -= 1
+        self.completed += 1
+        wait = max(0.0, started - submitted)
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return result
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        finished = self.completed
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.max_workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 2) if finished else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+_executor: CPUExecutor | None = None
+
+
+def get_cpu_executor() -> CPUExecutor:
+    global _executor
+    if _executor is None:
+        settings = get_settings()
+        _executor = CPUExecutor(
+            kind=settings.cpu_executor_kind,
+            max_workers=settings.cpu_executor_workers,
+            max_queue=settings.cpu_executor_max_queue,
+        )
+    return _executor
+
+
+async def run_cpu(fn: Callable, *args, **kwargs) -> Any:
+    """Dispatch a blocking, CPU-bound call through the shared executor."""
+    return await get_cpu_executor().run(fn, *args, **kwargs)
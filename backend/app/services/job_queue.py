@@ -0,0 +1,606 @@
+"""Durable queue of paper analyses, run by background worker tasks.
+
+Jobs are rows in the ``analysis_jobs`` table, so a closed browser tab or a
+server restart no longer strands a paper half-analysed: the job is simply
+picked up again. Workers claim queued jobs with a lease that they renew
+while running; a job whose lease runs out (its worker died) is re-queued.
+A failed attempt is retried with backoff. Completed results are stored with
+a digest of their inputs and reused while it matches, so a retry (or an
+"incremental" analysis) reruns only the agents whose inputs changed.
+
+Progress events go to the paper's progress bus; ``stream_progress``
+subscribes to it and never affects the job itself.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator
+from sqlalchemy import delete, func, select, update
+from app.config import get_settings
+from app.database import async_session
+from app.models import Analysis, AnalysisBatch, AnalysisJob, JobStatus, Paper, PaperStatus
+from app.orchestrator import PIPELINE, REUSED, run_pipeline
+from app.services.progress_bus import KEEPALIVE_SECONDS, get_progress_bus, peek_progress_bus
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+# Seconds between batch progress checks
+BATCH_PROGRESS_INTERVAL = 2.0
+AGENTS_FAILED = "Agents failed:"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobConflict(Exception):
+    """An analysis of the paper is already queued or running in a different mode."""
+
+    def __init__(self, job: AnalysisJob):
+        super().__init__(f"An analysis in {job.mode} mode is already {job.status}")
+        self.job = job
+
+
+def job_dict(job: AnalysisJob) -> dict:
+    return {
+        "id": job.id,
+        "paper_id": job.paper_id,
+        "status": job.status,
+        "mode": job.mode,
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobQueue:
+    """Enqueues analysis jobs, runs them on worker tasks and fans out their progress."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_delay: float = 30.0,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 2.0,
+        bulk_max_in_flight: int = 0,
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.bulk_max_in_flight = bulk_max_in_flight
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._enqueue_lock = asyncio.Lock()
+        # Claims in this process are serialised so the bulk in-flight count cannot go stale mid-claim
+        self._claim_lock = asyncio.Lock()
+        self._running: set[str] = set()
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.reclaimed = 0
+
+    # ── Lifecycle ────────────────────────────────────────────────
+
+    async def start(self):
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        """Stop the workers; their jobs go back to the queue for the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # ── Enqueue / inspect ────────────────────────────────────────
+
+    async def enqueue(self, paper_id: str, mode: str = "full", batch_id: str | None = None) -> AnalysisJob:
+        """Queue an analysis of a paper, or return the one already queued or running.
+
+        ``mode`` "full" discards previous results first; "incremental" keeps
+        them for reuse where the agent's inputs are unchanged. Raises
+        JobConflict if the active analysis was requested in the other mode.
+        Jobs of a ``batch_id`` are picked up after interactive ones.
+        """
+        async with self._enqueue_lock, async_session() as db:
+            active = await db.execute(
+                select(AnalysisJob)
+                .where(AnalysisJob.paper_id == paper_id, AnalysisJob.status.in_(ACTIVE))
+                .order_by(AnalysisJob.created_at.desc())
+                .limit(1)
+            )
+            job = active.scalar_one_or_none()
+            if job is not None:
+                if job.mode != mode:
+                    raise JobConflict(job)
+                return job
+
+            if mode == "full":
+                # Delete old analyses to start fresh
+                await db.execute(delete(Analysis).where(Analysis.paper_id == paper_id))
+            paper = await db.get(Paper, paper_id)
+            if paper is not None:
+                paper.status = PaperStatus.PROCESSING
+            job = AnalysisJob(paper_id=paper_id, mode=mode, batch_id=batch_id)
+            db.add(job)
+            await db.commit()
+
+        self.enqueued += 1
+        self._publish(job, {"agent": "pipeline", "status": "queued", "detail": "Waiting for a worker..."})
+        self._wakeup.set()
+        return job
+
+    async def enqueue_batch(
+        self,
+        paper_ids: list[str],
+        mode: str = "full",
+        workspace_id: str | None = None,
+    ) -> AnalysisBatch:
+        """Queue analyses of many papers as one batch (joining any already in progress)."""
+        async with async_session() as db:
+            batch = AnalysisBatch(workspace_id=workspace_id)
+            db.add(batch)
+            await db.commit()
+            job_ids = []
+            for paper_id in paper_ids:
+                try:
+                    job = await self.enqueue(paper_id, mode, batch.id)
+                except JobConflict as e:
+                    job = e.job
+                job_ids.append(job.id)
+            batch.job_ids = json.dumps(job_ids)
+            await db.commit()
+        return batch
+
+    async def batch_progress(self, batch_id: str) -> dict | None:
+        """Aggregate status, throughput and ETA of a batch, or None if it does not exist."""
+        async with async_session() as db:
+            batch = await db.get(AnalysisBatch, batch_id)
+            if batch is None:
+                return None
+            job_ids = json.loads(batch.job_ids)
+            result = await db.execute(select(AnalysisJob).where(AnalysisJob.id.in_(job_ids)))
+            jobs = result.scalars().all()
+
+        counts = {status.value: 0 for status in JobStatus}
+        for job in jobs:
+            counts[job.status] += 1
+        total = len(jobs)
+        finished = counts[JobStatus.COMPLETED.value] + counts[JobStatus.ERROR.value]
+        agents_total = total * len(PIPELINE)
+        agents_finished = sum(min(job.agents_finished or 0, len(PIPELINE)) for job in jobs)
+        # created_at comes back from SQLite without tzinfo
+        elapsed = (_now().replace(tzinfo=None) - batch.created_at.replace(tzinfo=None)).total_seconds()
+        per_minute = finished / elapsed * 60 if elapsed > 0 else 0.0
+        return {
+            "batch_id": batch.id,
+            "workspace_id": batch.workspace_id,
+            "status": "completed" if finished == total else "running",
+            "total": total,
+            **counts,
+            "agents_finished": agents_finished,
+            "agents_total": agents_total,
+            "elapsed_seconds": round(elapsed, 1),
+            "papers_per_minute": round(per_minute, 2),
+            "eta_seconds": round((total - finished) / per_minute * 60) if per_minute else None,
+        }
+
+    async def latest_job(self, paper_id: str) -> AnalysisJob | None:
+        async with async_session() as db:
+            result = await db.execute(
+                select(AnalysisJob)
+                .where(AnalysisJob.paper_id == paper_id)
+                .order_by(AnalysisJob.created_at.desc())
+                .limit(1)
+            )
+            return result.scalar_one_or_none()
+
+    # ── Progress fan-out ─────────────────────────────────────────
+
+    def _publish(self, job: AnalysisJob, event: dict, final: bool = False):
+        get_progress_bus(job.paper_id).publish(event, final=final)
+
+    @staticmethod
+    def _final_event(job: AnalysisJob) -> dict:
+        if job.status == JobStatus.COMPLETED.value:
+            return {"agent": "pipeline", "status": "completed", "detail": "All agents finished"}
+        if job.error and job.error.startswith(AGENTS_FAILED):
+            # The pipeline ran to the end; the failed agents reported their own errors
+            return {"agent": "pipeline", "status": "completed", "detail": f"All agents finished. {job.error}"}
+        return {"agent": "pipeline", "status": "error", "detail": job.error or "Analysis failed"}
+
+    # ── Workers ──────────────────────────────────────────────────
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Failed to claim an analysis job")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _claim(self) -> AnalysisJob | None:
+        """Take the oldest due job, re-queueing jobs whose worker went away first."""
+        now = _now()
+        async with self._claim_lock, async_session() as db:
+            await self._reclaim_expired(db, now)
+            while True:
+                query = (
+                    select(AnalysisJob)
+                    .where(AnalysisJob.status == JobStatus.QUEUED.value, AnalysisJob.available_at <= now)
+                    # Interactive jobs first, then oldest first
+                    .order_by(AnalysisJob.batch_id.is_not(None), AnalysisJob.created_at)
+                    .limit(1)
+                )
+                if self.bulk_max_in_flight > 0 and await self._bulk_in_flight(db) >= self.bulk_max_in_flight:
+                    query = query.where(AnalysisJob.batch_id.is_(None))
+                result = await db.execute(query)
+                job = result.scalar_one_or_none()
+                if job is None:
+                    return None
+                # Conditional update, so two workers never claim the same job
+                claimed = await db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job.id, AnalysisJob.status == JobStatus.QUEUED.value)
+                    .values(
+                        status=JobStatus.RUNNING.value,
+                        worker_id=self.worker_id,
+                        attempts=AnalysisJob.attempts + 1,
+                        started_at=now,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        agents_finished=0,
+                    )
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    await db.refresh(job)
+                    return job
+
+    @staticmethod
+    async def _bulk_in_flight(db) -> int:
+        result = await db.execute(
+            select(func.count())
+            .select_from(AnalysisJob)
+            .where(AnalysisJob.status == JobStatus.RUNNING.value, AnalysisJob.batch_id.is_not(None))
+        )
+        return result.scalar_one()
+
+    async def _reclaim_expired(self, db, now: datetime):
+        result = await db.execute(
+            select(AnalysisJob).where(
+                AnalysisJob.status == JobStatus.RUNNING.value,
+                AnalysisJob.lease_expires_at < now,
+            )
+        )
+        given_up = []
+        for job in result.scalars().all():
+            logger.warning("Analysis job %s lost its worker %s; re-queueing", job.id, job.worker_id)
+            self.reclaimed += 1
+            if job.attempts >= self.max_attempts:
+                await self._finish(db, job, JobStatus.ERROR, "Worker stopped responding")
+                given_up.append(job)
+            else:
+                job.status = JobStatus.QUEUED.value
+                job.worker_id = None
+                job.available_at = now
+        await db.commit()
+        for job in given_up:
+            self.failed += 1
+            self._publish(job, self._final_event(job), final=True)
+
+    def _owned(self, job: AnalysisJob):
+        """Condition matching the job row only while this attempt still holds its lease.
+
+        ``attempts`` is bumped by every claim, so it tells this attempt apart
+        from a later one, even by another worker task of this process.
+        """
+        return (
+            (AnalysisJob.id == job.id)
+            & (AnalysisJob.status == JobStatus.RUNNING.value)
+            & (AnalysisJob.worker_id == self.worker_id)
+            & (AnalysisJob.attempts == job.attempts)
+        )
+
+    async def _heartbeat(self, job: AnalysisJob, attempt: asyncio.Task, lease_lost: asyncio.Event):
+        """Renew the job's lease; if it was reclaimed meanwhile, cancel the attempt."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with async_session() as db:
+                    renewed = await db.execute(
+                        update(AnalysisJob)
+                        .where(self._owned(job))
+                        .values(lease_expires_at=_now() + timedelta(seconds=self.lease_seconds))
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("Failed to renew the lease of analysis job %s", job.id)
+                continue
+            if renewed.rowcount == 0:
+                logger.warning("Analysis job %s was reclaimed from this worker; abandoning its attempt", job.id)
+                lease_lost.set()
+                attempt.cancel()
+                return
+
+    async def _count_agent(self, job: AnalysisJob):
+        # Also kept on the detached job, which _complete/_retry merge back
+        job.agents_finished = (job.agents_finished or 0) + 1
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    update(AnalysisJob)
+                    .where(self._owned(job))
+                    .values(agents_finished=func.coalesce(AnalysisJob.agents_finished, 0) + 1)
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to record agent progress of analysis job %s", job.id)
+
+    async def _load(self, job: AnalysisJob) -> tuple[str | None, dict[str, tuple[str, dict]]]:
+        """Return the paper text and the reusable results, as (input digest, result) by agent."""
+        async with async_session() as db:
+            paper = await db.get(Paper, job.paper_id)
+            if paper is None or not paper.raw_text:
+                return None, {}
+            result = await db.execute(
+                select(Analysis)
+                .where(Analysis.paper_id == job.paper_id)
+                .order_by(Analysis.created_at)
+            )
+            previous = {}
+            for analysis in result.scalars().all():
+                if analysis.status == "completed" and analysis.input_digest:
+                    try:
+                        previous[analysis.agent_name] = (analysis.input_digest, json.loads(analysis.result))
+                    except json.JSONDecodeError:
+                        pass
+            return paper.raw_text, previous
+
+    async def _prune(self, paper_id: str, reused: set[str] = frozenset()):
+        """Keep the latest analysis of each agent, and its latest completed one if that failed since.
+
+        For ``reused`` agents the latest completed analysis is the current
+        result, so failed runs after it are dropped too.
+        """
+        async with async_session() as db:
+            result = await db.execute(
+                select(Analysis.id, Analysis.agent_name, Analysis.status)
+                .where(Analysis.paper_id == paper_id)
+                .order_by(Analysis.created_at.desc())
+            )
+            # A failed latest run must not take the last good (and reusable) result with it
+            latest, completed, stale = set(), set(), []
+            for analysis_id, agent_name, status in result.all():
+                if agent_name in reused and status != "completed":
+                    stale.append(analysis_id)
+                    continue
+                if agent_name in latest and (status != "completed" or agent_name in completed):
+                    stale.append(analysis_id)
+                latest.add(agent_name)
+                if status == "completed":
+                    completed.add(agent_name)
+            if stale:
+                await db.execute(delete(Analysis).where(Analysis.id.in_(stale)))
+                await db.commit()
+
+    async def _run(self, job: AnalysisJob):
+        self._running.add(job.id)
+        lease_lost = asyncio.Event()
+        attempt = asyncio.create_task(self._attempt(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, attempt, lease_lost))
+        try:
+            await attempt
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                # Shutting down: hand the job back without spending an attempt
+                attempt.cancel()
+                await self._release(job)
+                raise
+            # Reclaimed: the job now belongs to another attempt, which reports on it
+        finally:
+            heartbeat.cancel()
+            self._running.discard(job.id)
+
+    async def _attempt(self, job: AnalysisJob):
+        reused = set()
+
+        async def callback(agent: str, status: str, detail: str, partial: dict | None = None):
+            if detail == REUSED:
+                reused.add(agent)
+            if agent in PIPELINE and status in ("completed", "error"):
+                await self._count_agent(job)
+            event = {"agent": agent, "status": status, "detail": detail}
+            if partial is not None:
+                event["partial"] = partial
+            self._publish(job, event)
+
+        try:
+            paper_text, previous = await self._load(job)
+            if paper_text is None:
+                await self._complete(job, JobStatus.ERROR, "Paper has no text to analyze")
+                return
+            self._publish(job, {
+                "agent": "pipeline",
+                "status": "running",
+                "detail": f"Attempt {job.attempts} of {self.max_attempts}",
+            })
+            context = await run_pipeline(job.paper_id, paper_text, callback, previous)
+            await self._prune(job.paper_id, reused)
+            failed = [name for name, result in context.items() if "error" in result]
+            if not failed:
+                await self._complete(job, JobStatus.COMPLETED)
+            elif job.attempts < self.max_attempts:
+                await self._retry(job, f"{AGENTS_FAILED} {', '.join(failed)}")
+            else:
+                await self._complete(job, JobStatus.ERROR, f"{AGENTS_FAILED} {', '.join(failed)}")
+        except Exception as e:
+            logger.exception("Analysis job %s failed", job.id)
+            if job.attempts < self.max_attempts:
+                await self._retry(job, str(e))
+            else:
+                await self._complete(job, JobStatus.ERROR, str(e))
+
+    async def _finish(self, db, job: AnalysisJob, status: JobStatus, error: str | None = None):
+        job.status = status.value
+        job.error = error
+        job.finished_at = _now()
+        job.lease_expires_at = None
+        paper = await db.get(Paper, job.paper_id)
+        if paper is not None:
+            paper.status = PaperStatus.COMPLETED if status == JobStatus.COMPLETED else PaperStatus.ERROR
+
+    async def _still_owned(self, db, job: AnalysisJob) -> bool:
+        """Whether this attempt still holds the job; if not, its outcome must not be written."""
+        result = await db.execute(select(AnalysisJob.id).where(self._owned(job)))
+        if result.scalar_one_or_none() is None:
+            logger.warning("Analysis job %s was reclaimed from this worker; dropping its outcome", job.id)
+            return False
+        return True
+
+    async def _complete(self, job: AnalysisJob, status: JobStatus, error: str | None = None):
+        async with async_session() as db:
+            if not await self._still_owned(db, job):
+                return
+            job = await db.merge(job)
+            await self._finish(db, job, status, error)
+            await db.commit()
+        if status == JobStatus.COMPLETED:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self._publish(job, self._final_event(job), final=True)
+
+    async def _retry(self, job: AnalysisJob, reason: str):
+        delay = self.retry_delay * 2 ** (job.attempts - 1)
+        async with async_session() as db:
+            if not await self._still_owned(db, job):
+                return
+            job = await db.merge(job)
+            job.status = JobStatus.QUEUED.value
+            job.error = reason
+            job.worker_id = None
+            job.lease_expires_at = None
+            job.available_at = _now() + timedelta(seconds=delay)
+            await db.commit()
+        self.retried += 1
+        self._publish(job, {
+            "agent": "pipeline",
+            "status": "retrying",
+            "detail": f"{reason}. Retrying in {delay:g}s (attempt {job.attempts + 1} of {self.max_attempts})",
+        })
+
+    async def _release(self, job: AnalysisJob):
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    update(AnalysisJob)
+                    .where(self._owned(job))
+                    .values(
+                        status=JobStatus.QUEUED.value,
+                        worker_id=None,
+                        lease_expires_at=None,
+                        available_at=_now(),
+                        attempts=AnalysisJob.attempts - 1,
+                    )
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to release analysis job %s", job.id)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "running": len(self._running),
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "reclaimed": self.reclaimed,
+        }
+
+
+async def stream_progress(paper_id: str, last_event_id: str | None = None) -> AsyncGenerator[str, None]:
+    """SSE stream of a paper's analysis progress; disconnecting does not affect the job.
+
+    Without ``last_event_id`` the stream starts at the current (or last)
+    analysis' first event; with it, after that event.
+    """
+    bus = peek_progress_bus(paper_id)
+    if bus is None:
+        # Nothing published in this process yet (e.g. after a restart): start from the job's state
+        bus = get_progress_bus(paper_id)
+        job = await get_job_queue().latest_job(paper_id)
+        if job is not None and job.status in ACTIVE:
+            bus.active = True  # its events will arrive once a worker here picks it up
+        elif job is not None:
+            bus.publish(JobQueue._final_event(job), final=True)
+
+    async for item in bus.subscribe(last_event_id):
+        if item is None:
+            yield ": keepalive\n\n"
+        else:
+            event_id, event = item
+            yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_batch(batch_id: str) -> AsyncGenerator[str, None]:
+    """SSE stream of a batch's aggregate progress, sent whenever it changes, until it finishes."""
+    queue = get_job_queue()
+    last = None
+    idle = 0.0
+    while True:
+        progress = await queue.batch_progress(batch_id)
+        if progress is None:
+            return
+        # Elapsed time and ETA always move; only send when the counts do
+        key = {k: v for k, v in progress.items() if k not in ("elapsed_seconds", "papers_per_minute", "eta_seconds")}
+        if key != last:
+            last = key
+            idle = 0.0
+            yield f"data: {json.dumps(progress)}\n\n"
+        elif idle >= KEEPALIVE_SECONDS:
+            idle = 0.0
+            yield ": keepalive\n\n"
+        if progress["status"] == "completed":
+            return
+        await asyncio.sleep(BATCH_PROGRESS_INTERVAL)
+        idle += BATCH_PROGRESS_INTERVAL
+
+
+_job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        settings = get_settings()
+        _job_queue = JobQueue(
+            workers=settings.job_workers,
+            max_attempts=settings.job_max_attempts,
+            retry_delay=settings.job_retry_delay_seconds,
+            lease_seconds=settings.job_lease_seconds,
+            poll_interval=settings.job_poll_interval_seconds,
+            bulk_max_in_flight=settings.job_bulk_max_in_flight,
+        )
+    return _job_queue
@@ -0,0 +1,306 @@
+"""Lenient, single-pass repair of JSON produced by LLMs.
+
+``complete_json`` scans the first object or array in a response the way a
+JSON tokenizer would, fixing what models commonly get wrong, and remembers
+the last point at which everything before it was a complete value. If the
+text ends early (e.g. the completion hit its token limit) the incomplete
+tail is dropped back to that point and the open containers are closed, so
+a prefix of a JSON document always yields the valid document it starts.
+"""
+
+import json
+import re
+from typing import Any
+
+_FENCE = re.compile(r"^```(?:json)?\s*\n?|\n?```\s*$")
+_SCALAR = re.compile(r"-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|[A-Za-z_]+")
+_LITERALS = {
+    "true": "true",
+    "false": "false",
+    "null": "null",
+    "True": "true",
+    "False": "false",
+    "None": "null",
+}
+_CLOSERS = {"{": "}", "[": "]"}
+_VALID_ESCAPES = set('"\\/bfnrt')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def _read_string(text: str, i: int) -> tuple[str, int, bool]:
+    """Read the string starting at text[i] == '"'.
+
+    Returns (JSON string literal without its closing quote, index after it,
+    whether the closing quote was found). Raw control characters and invalid
+    escapes are escaped; an escape cut off by the end of text is dropped.
+    """
+    parts = ['"']
+    j, n = i + 1, len(text)
+    while j < n:
+        c = text[j]
+        if c == "\\":
+            if j + 1 >= n:
+                break
+            nxt = text[j + 1]
+            if nxt == "u":
+                code = text[j + 2 : j + 6]
+                if len(code) < 4:
+                    break
+                parts.append(text[j : j + 6])
+                j += 6
+                continue
+            parts.append(text[j : j + 2] if nxt in _VALID_ESCAPES else "\\\\" + nxt)
+            j += 2
+            continue
+        if c == '"':
+            return "".join(parts), j + 1, True
+        parts.append(_CONTROL_ESCAPES.get(c, f"\\u{ord(c):04x}") if c < " " else c)
+        j += 1
+    return "".join(parts), n, False
+
+
+def complete_json(text: str) -> str | None:
+    """Return valid JSON for the first object or array in text, or None if there is none.
+
+    Handles surrounding prose, trailing commas, raw newlines in strings,
+    Python literals (True/False/None), mismatched closing brackets and
+    truncation; a string value cut off mid-way is kept and closed.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+
+    out: list[str] = []
+    stack: list[str] = []
+    expect_key: list[bool] = []  # per open container: next token is an object key
+    safe_len, safe_stack = 0, ()
+
+    def value_done():
+        nonlocal safe_len, safe_stack
+        safe_len, safe_stack = len(out), tuple(stack)
+
+    i, n = min(starts), len(text)
+    complete = False
+    while i < n:
+        ch = text[i]
+        if ch == '"':
+            literal, i, closed = _read_string(text, i)
+            is_key = bool(stack) and expect_key[-1]
+            if not closed:
+                if not is_key:
+                    out.append(literal + '"')
+                    value_done()
+                break
+            out.append(literal + '"')
+            if not is_key:
+                value_done()
+            continue
+        if ch in "{[":
+            stack.append(ch)
+            expect_key.append(ch == "{")
+            out.append(ch)
+            value_done()
+        elif ch in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            if not stack:
+                break
+            out.append(_CLOSERS[stack.pop()])
+            expect_key.pop()
+            value_done()
+            if not stack:
+                complete = True
+                break
+        elif ch == ",":
+            out.append(ch)
+            if stack and stack[-1] == "{":
+                expect_key[-1] = True
+        elif ch == ":":
+            out.append(ch)
+            if stack:
+                expect_key[-1] = False
+        elif ch.isspace():
+            out.append(ch)
+        else:
+            match = _SCALAR.match(text, i)
+            if match is None:
+                i += 1  # stray character
+                continue
+            if match.end() >= n:
+                break  # possibly cut off mid-token
+            token = match.group()
+            if token[0].isalpha() or token[0] == "_":
+                token = _LITERALS.get(token, "null")
+            elif token.endswith("."):
+                token += "0"
+            out.append(token)
+            value_done()
+            i = match.end()
+            continue
+        i += 1
+
+    if complete:
+        return "".join(out)
+    return "".join(out[:safe_len]) + "".join(_CLOSERS[c] for c in reversed(safe_stack))
+
+
+def parse_json(text: str) -> tuple[Any, bool]:
+    """Parse an LLM response as JSON, repairing it if necessary.
+
+    Returns (value, repaired). Raises ValueError if nothing usable is found.
+    """
+    text = _FENCE.sub("", text.strip())
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+    completed = complete_json(text)
+    if completed is None:
+        raise ValueError("Response contains no JSON object")
+    try:
+        return json.loads(completed), True
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON: {e}") from e
+
+
+class JsonStreamParser:
+    """Incremental scanner for a JSON object that arrives in pieces.
+
+    ``feed`` consumes each new piece exactly once and returns the top-level
+    fields completed by it as ``(key, index, value)`` tuples: ``index`` is
+    None for a complete field and the item position for each completed item
+    of a top-level array (the array itself is not reported again). Anything
+    before the opening brace, such as a code fence, is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: str | None = None
+        self._expect_key = True
+        self._value_start: int | None = None
+        self._in_array = False  # the current top-level value is an array
+        self._item_start: int | None = None
+        self._item_index = 0
+
+    def feed(self, piece: str) -> list[tuple[str, int | None, Any]]:
+        self.text += piece
+        events: list[tuple[str, int | None, Any]] = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self._done:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(i, events)
+            elif self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+            elif ch.isspace():
+                pass
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._mark_start(i)
+            elif ch in "{[":
+                self._mark_start(i)
+                self._depth += 1
+                if self._depth == 2 and ch == "[":
+                    self._in_array = True
+                    self._item_start = None
+                    self._item_index = 0
+            elif ch in "}]":
+                self._end_scalar(i, events)
+                self._depth -= 1
+                if self._depth == 2 and self._in_array:
+                    self._emit_item(i + 1, events)
+                elif self._depth == 1:
+                    if not self._in_array:
+                        self._emit_field(i + 1, events)
+                    self._reset_field()
+                elif self._depth == 0:
+                    self._done = True
+            elif ch == ",":
+                self._end_scalar(i, events)
+                if self._depth == 1:
+                    self._reset_field()
+            elif ch == ":":
+                if self._depth == 1:
+                    self._expect_key = False
+            else:
+                self._mark_start(i)
+            i += 1
+        self._pos = i
+        return events
+
+    def _mark_start(self, i: int):
+        if self._depth == 1 and not self._expect_key and self._value_start is None:
+            self._value_start = i
+        elif self._depth == 2 and self._in_array and self._item_start is None:
+            self._item_start = i
+
+    def _end_string(self, i: int, events: list):
+        if self._depth == 1 and self._expect_key:
+            try:
+                self._key = json.loads(self.text[self._string_start : i + 1])
+            except json.JSONDecodeError:
+                self._key = None
+        elif self._depth == 1 and self._value_start == self._string_start:
+            self._emit_field(i + 1, events)
+            self._value_start = None
+        elif self._depth == 2 and self._in_array and self._item_start == self._string_start:
+            self._emit_item(i + 1, events)
+
+    def _end_scalar(self, i: int, events: list):
+        """Close a number/literal value that ends at the delimiter text[i]."""
+        if self._depth == 1 and self._value_start is not None and not self._in_array:
+            if self.text[self._value_start] not in '"{[':
+                self._emit_field(i, events)
+                self._value_start = None
+        elif self._depth == 2 and self._in_array and self._item_start is not None:
+            if self.text[self._item_start] not in '"{[':
+                self._emit_item(i, events)
+
+    def _reset_field(self):
+        self._key = None
+        self._expect_key = True
+        self._value_start = None
+        self._in_array = False
+
+    def _emit_field(self, end: int, events: list):
+        value = self._decode(self._value_start, end)
+        if self._key is not None and value is not _INVALID:
+            events.append((self._key, None, value))
+        self._value_start = None
+
+    def _emit_item(self, end: int, events: list):
+        value = self._decode(self._item_start, end)
+        if self._key is not None and value is not _INVALID:
+            events.append((self._key, self._item_index, value))
+        self._item_index += 1
+        self._item_start = None
+
+    def _decode(self, start: int | None, end: int) -> Any:
+        if start is None:
+            return _INVALID
+        fragment = self.text[start:end]
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            try:
+                return parse_json(fragment)[0]
+            except ValueError:
+                return _INVALID
+
+
+_INVALID = object()
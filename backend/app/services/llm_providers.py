@@ -0,0 +1,351 @@
+"""Alternative LLM providers for offline load testing and reproducible runs.
+
+Providers are drop-in chat clients: they expose the subset of the Cerebras
+SDK client used by llm_service (``chat.completions.create`` with or without
+``stream=True``, and ``close``), so scheduling, retries, circuit breakers,
+caching and streaming behave exactly as they do against the live API.
+
+- ``FakeChatClient`` answers locally with seeded latency, token-rate pacing
+  and schema-valid JSON sampled from the agent schemas.
+- ``RecordReplayChatClient`` records live responses to disk and serves them
+  back, keyed like the response cache.
+"""
+
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Protocol
+from app.agents import schemas
+from app.services.llm_cache import make_key
+
+_WORDS = (
+    "model data method results training evaluation baseline performance learning "
+    "approach dataset task accuracy proposed analysis network experiments feature "
+    "improvement framework benchmark robust efficient novel attention representation"
+).split()
+
+
+class ChatClient(Protocol):
+    """What llm_service needs from a provider client."""
+
+    chat: Any  # chat.completions.create(messages=..., model=..., stream=..., **params)
+
+    async def close(self): ...
+
+
+# ── SDK-shaped response objects ──────────────────────────────────
+
+
+@dataclass
+class Usage:
+    prompt_tokens: int
+    completion_tokens: int
+
+
+@dataclass
+class Message:
+    content: str
+
+
+@dataclass
+class Choice:
+    message: Message
+
+
+@dataclass
+class Completion:
+    choices: list[Choice]
+    usage: Usage | None = None
+
+
+@dataclass
+class Delta:
+    content: str | None
+
+
+@dataclass
+class ChunkChoice:
+    delta: Delta
+
+
+@dataclass
+class Chunk:
+    choices: list[ChunkChoice] = field(default_factory=list)
+    usage: Usage | None = None
+
+
+class ChunkStream:
+    """Async iterator of Chunks with the SDK stream's ``close()``."""
+
+    def __init__(self, chunks: AsyncIterator[Chunk]):
+        self._chunks = chunks
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Chunk:
+        return await self._chunks.__anext__()
+
+    async def close(self):
+        await self._chunks.aclose()
+
+
+class _Namespace:
+    def __init__(self, create):
+        self.completions = type("Completions", (), {"create": staticmethod(create)})()
+
+
+class ProviderError(Exception):
+    """Provider failure carrying an HTTP-like status code (so it is classified like API errors)."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _split_tokens(text: str) -> list[str]:
+    """Split text into roughly token-sized pieces that concatenate back to it."""
+    return re.findall(r"\s*\S{1,4}|\s+", text)
+
+
+# ── Fake provider ────────────────────────────────────────────────
+
+# Agent output schemas the fake provider can produce, matched against the prompt
+FAKE_SCHEMAS: list[type] = [
+    schemas.Extraction,
+    schemas.Simplification,
+    schemas.RelatedResearch,
+    schemas.GapAnalysis,
+    schemas.ImplementationGuide,
+    schemas.KnowledgeGraph,
+    schemas.ClaimList,
+    schemas.OriginalityReport,
+    schemas.PeerReview,
+]
+
+
+def parse_distribution(spec: str):
+    """Parse ``fixed:S``, ``uniform:A:B`` or ``lognormal:MEDIAN:SIGMA`` (seconds) into a sampler."""
+    kind, *args = spec.split(":")
+    values = [float(a) for a in args]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Invalid latency distribution: {spec!r}")
+
+
+def _sample_json(node: dict, defs: dict, rng: random.Random, depth: int = 0) -> Any:
+    """Build a value satisfying a (pydantic-generated) JSON schema node."""
+    if "$ref" in node:
+        return _sample_json(defs[node["$ref"].rsplit("/", 1)[-1]], defs, rng, depth)
+    if "anyOf" in node:
+        options = [o for o in node["anyOf"] if o.get("type") != "null"]
+        return _sample_json(options[0], defs, rng, depth) if options else None
+    kind = node.get("type")
+    if kind == "object":
+        properties = node.get("properties")
+        if properties:
+            return {k: _sample_json(v, defs, rng, depth + 1) for k, v in properties.items()}
+        return {rng.choice(_WORDS): round(rng.uniform(0, 100), 2) for _ in range(3)}
+    if kind == "array":
+        count = rng.randint(2, 4) if depth < 4 else 1
+        return [_sample_json(node.get("items", {}), defs, rng, depth + 1) for _ in range(count)]
+    if kind == "integer":
+        return rng.randint(1, 10)
+    if kind == "number":
+        return round(rng.uniform(0, 10), 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 16)))
+
+
+def _pick_schema(prompt: str, response_format: dict | None) -> type | None:
+    if response_format and response_format.get("type") == "json_schema":
+        name = response_format["json_schema"]["name"]
+        return next((s for s in FAKE_SCHEMAS if s.__name__ == name), None)
+    if not response_format and "JSON" not in prompt:
+        return None
+    # The best match is the schema whose top-level keys the prompt spells out
+    best, best_hits = None, 0
+    for schema in FAKE_SCHEMAS:
+        hits = sum(f'"{name}"' in prompt for name in schema.model_fields)
+        if hits > best_hits:
+            best, best_hits = schema, hits
+    return best
+
+
+class FakeChatClient:
+    """Deterministic offline provider.
+
+    Output and timing are seeded from the request, so the same request always
+    gets the same answer after the same delay. Time to first token follows
+    ``latency``; the rest of the response is paced at ``tokens_per_second``.
+    A fraction ``error_rate`` of requests fail with a retryable 503.
+    """
+
+    def __init__(
+        self,
+        latency: str = "lognormal:0.8:0.5",
+        tokens_per_second: float = 400.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.sample_latency = parse_distribution(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.seed = seed
+        # Failures are drawn in request order, not per request, so retries can succeed
+        self._error_rng = random.Random(seed)
+        self.chat = _Namespace(self._create)
+
+    def _rng(self, model: str, messages: list[dict], params: dict) -> random.Random:
+        key = make_key(model, messages, params)
+        return random.Random(f"{self.seed}:{key}")
+
+    def _respond(self, messages: list[dict], params: dict, rng: random.Random) -> str:
+        prompt = "\n".join(m["content"] for m in messages)
+        schema = _pick_schema(prompt, params.get("response_format"))
+        if schema is not None:
+            json_schema = schema.model_json_schema()
+            value = _sample_json(json_schema, json_schema.get("$defs", {}), rng)
+            return json.dumps(value, indent=2)
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(80, 240))) + "."
+
+    async def _create(self, messages: list[dict], model: str, stream: bool = False, **params):
+        rng = self._rng(model, messages, params)
+        first_token_delay = self.sample_latency(rng)
+        fails = self._error_rng.random() < self.error_rate
+        text = self._respond(messages, params, rng)
+        usage = Usage(_count_tokens("".join(m["content"] for m in messages)), _count_tokens(text))
+        max_tokens = params.get("max_completion_tokens")
+        if max_tokens is not None and usage.completion_tokens > max_tokens:
+            text = text[: max_tokens * 4]
+            usage.completion_tokens = max_tokens
+
+        if not stream:
+            await asyncio.sleep(first_token_delay + usage.completion_tokens / self.tokens_per_second)
+            if fails:
+                raise ProviderError("Fake provider: injected failure", 503)
+            return Completion([Choice(Message(text))], usage)
+
+        async def chunks():
+            await asyncio.sleep(first_token_delay)
+            pieces = _split_tokens(text)
+            for i, piece in enumerate(pieces):
+                if fails and i == len(pieces) // 2:
+                    raise ProviderError("Fake provider: injected failure", 503)
+                yield Chunk([ChunkChoice(Delta(piece))])
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield Chunk(usage=usage)
+
+        return ChunkStream(chunks())
+
+    async def close(self):
+        pass
+
+
+# ── Record / replay provider ─────────────────────────────────────
+
+
+def _write_record(path: str, record: dict) -> None:
+    """Write a recording atomically; concurrent identical requests each use their own temp file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_record(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class RecordReplayChatClient:
+    """Records live responses to ``directory`` ("record") or serves them back ("replay").
+
+    Recordings are JSON files named by the response-cache key of the request
+    (model, messages and sampling parameters; streaming does not matter), so a
+    recorded run can be replayed exactly. Recording always fetches the full
+    response and re-streams it if needed. Replay reproduces the recorded
+    latency scaled by ``speed`` (0 serves instantly); an unrecorded request
+    fails instead of reaching the network.
+    """
+
+    def __init__(self, mode: str, directory: str, client: Any = None, speed: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        if mode == "record" and client is None:
+            raise ValueError("Record mode needs a live client")
+        self.mode = mode
+        self.directory = directory
+        self.client = client
+        self.speed = speed
+        self.chat = _Namespace(self._create)
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, model: str, messages: list[dict], params: dict) -> str:
+        return os.path.join(self.directory, f"{make_key(model, messages, params)}.json")
+
+    async def _create(self, messages: list[dict], model: str, stream: bool = False, **params):
+        path = self._path(model, messages, params)
+        if self.mode == "record":
+            started = time.monotonic()
+            response = await self.client.chat.completions.create(messages=messages, model=model, **params)
+            usage = getattr(response, "usage", None)
+            record = {
+                "model": model,
+                "text": response.choices[0].message.content,
+                "latency": time.monotonic() - started,
+                "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                "completion_tokens": getattr(usage, "completion_tokens", None),
+            }
+            await asyncio.to_thread(_write_record, path, record)
+        else:
+            record = await asyncio.to_thread(_read_record, path)
+            if record is None:
+                raise ProviderError(f"No recorded response for this request ({os.path.basename(path)})", 404)
+
+        text = record["text"]
+        usage = Usage(
+            record.get("prompt_tokens") or _count_tokens("".join(m["content"] for m in messages)),
+            record.get("completion_tokens") or _count_tokens(text),
+        )
+        delay = record["latency"] * self.speed if self.mode == "replay" else 0.0
+        if not stream:
+            await asyncio.sleep(delay)
+            return Completion([Choice(Message(text))], usage)
+
+        async def chunks():
+            pieces = _split_tokens(text)
+            for piece in pieces:
+                yield Chunk([ChunkChoice(Delta(piece))])
+                await asyncio.sleep(delay / max(1, len(pieces)))
+            yield Chunk(usage=usage)
+
+        return ChunkStream(chunks())
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
@@ -1,14 +1,33 @@
 """Dual-model Cerebras LLM service — primary (gpt-oss-120b) + support (qwen-3-235b)."""
 
-from cerebras.cloud.sdk import Cerebras
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable
+import httpx
+from cerebras.cloud.sdk import AsyncCerebras, DefaultAsyncHttpxClient
 from app.config import get_settings
+from app.services.llm_cache import get_llm_cache, make_key
+from app.services.llm_providers import ChatClient, FakeChatClient, RecordReplayChatClient
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    backoff_delay,
+    hedged,
+    is_transient,
+)
+from app.services.single_flight import SingleFlight
+from app.services.json_repair import JsonStreamParser, parse_json
+from pydantic import BaseModel, ValidationError
 import json
-import re
-import asyncio
 
 # Two separate clients for dual-model architecture
-_primary_client = None   # gpt-oss-120b
-_support_client = None   # qwen-3-235b
+_primary_client: ChatClient | None = None   # gpt-oss-120b
+_support_client: ChatClient | None = None   # qwen-3-235b
 
 PRIMARY_MODEL = "gpt-oss-120b"
 SUPPORT_MODEL = "qwen-3-235b-a22b-instruct-2507"
@@ -22,23 +41,226 @@ SUPPORT_MODEL_AGENTS = {
 }
 
 
-def _get_primary_client():
+# Sampling parameters for every completion (also part of the response cache key)
+SAMPLING_PARAMS = {
+    "max_completion_tokens": 16384,
+    "temperature": 0.7,
+    "top_p": 0.9,
+}
+
+# Token usage of the current BaseAgent.run (or other track_usage block)
+_usage: ContextVar[dict | None] = ContextVar("llm_usage", default=None)
+
+# Receiver of partial results for streamed generate_json calls (see partial_results)
+_partial_callback: ContextVar[Callable[[dict], Awaitable[None]] | None] = ContextVar(
+    "llm_partial_callback", default=None
+)
+# Set for the duration of one streamed generate_json call
+_stream_sink: ContextVar["PartialJsonSink | None"] = ContextVar("llm_stream_sink", default=None)
+
+# Partial items are forwarded in batches of this size, or after this many seconds
+PARTIAL_BATCH_SIZE = 5
+PARTIAL_MAX_DELAY = 0.5
+
+# Identical concurrent generations share one request
+_flight = SingleFlight("llm")
+
+# Scheduling priorities: lower runs first
+PRIORITY_INTERACTIVE = 0   # user-facing chat
+PRIORITY_BACKGROUND = 1    # pipeline agents
+
+
+class ModelScheduler:
+    """Concurrency cap + token-bucket rate limit with priority queueing for one model.
+
+    Callers wait in a priority heap (FIFO within a priority) until both a
+    concurrency slot and a rate token are available, so interactive requests
+    overtake queued background work instead of hitting provider 429s.
+    """
+
+    def __init__(self, model: str, max_concurrency: int, requests_per_minute: float, burst: int):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.rate = requests_per_minute / 60.0  # tokens per second; 0 = unlimited
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._heap: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_BACKGROUND):
+        """Hold one concurrency slot (and consume one rate token) for the block."""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), future))
+        enqueued = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Granted just before cancellation: hand the slot back
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+        wait = time.monotonic() - enqueued
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        try:
+            yield
+        finally:
+            self.completed += 1
+            self._release()
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._heap and self._active < self.max_concurrency:
+            _, _, future = self._heap[0]
+            if future.done():  # waiter was cancelled
+                heapq.heappop(self._heap)
+                continue
+            if self.rate:
+                self._refill()
+                if self._tokens < 1:
+                    delay = (1 - self._tokens) / self.rate
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                    return
+                self._tokens -= 1
+            heapq.heappop(self._heap)
+            self._active += 1
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        queued: dict[str, int] = {}
+        for priority, _, future in self._heap:
+            if not future.done():
+                name = "interactive" if priority == PRIORITY_INTERACTIVE else "background"
+                queued[name] = queued.get(name, 0) + 1
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queued": queued,
+            "queue_depth": sum(queued.values()),
+            "requests_per_minute": self.rate * 60,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+_schedulers: dict[str, ModelScheduler] = {}
+
+
+def get_scheduler(model: str) -> ModelScheduler:
+    if model not in _schedulers:
+        settings = get_settings()
+        if model == SUPPORT_MODEL:
+            _schedulers[model] = ModelScheduler(
+                model,
+                settings.llm_support_max_concurrency,
+                settings.llm_support_rpm,
+                settings.llm_support_burst,
+            )
+        else:
+            _schedulers[model] = ModelScheduler(
+                model,
+                settings.llm_primary_max_concurrency,
+                settings.llm_primary_rpm,
+                settings.llm_primary_burst,
+            )
+    return _schedulers[model]
+
+
+def get_scheduler_stats() -> dict:
+    return {model: get_scheduler(model).stats() for model in (PRIMARY_MODEL, SUPPORT_MODEL)}
+
+
+def _make_cerebras_client(api_key: str) -> AsyncCerebras:
+    """Create a natively async client with its own pooled HTTP connections.
+
+    The connection pool size (LLM_MAX_CONNECTIONS) is the only cap on
+    in-flight requests per client; no worker threads are involved. The SDK's
+    own retries are disabled so retries can consult the circuit breakers.
+    """
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_connections,
+    )
+    return AsyncCerebras(
+        api_key=api_key,
+        timeout=settings.llm_timeout_seconds,
+        max_retries=0,  # retries are handled by _call_route
+        http_client=DefaultAsyncHttpxClient(limits=limits),
+    )
+
+
+def _make_client(api_key: str) -> ChatClient:
+    """Create the chat client for the configured LLM_PROVIDER."""
+    settings = get_settings()
+    provider = settings.llm_provider
+    if provider == "fake":
+        return FakeChatClient(
+            latency=settings.llm_fake_latency,
+            tokens_per_second=settings.llm_fake_tokens_per_second,
+            error_rate=settings.llm_fake_error_rate,
+            seed=settings.llm_fake_seed,
+        )
+    if provider in ("record", "replay"):
+        return RecordReplayChatClient(
+            provider,
+            settings.llm_replay_dir,
+            client=_make_cerebras_client(api_key) if provider == "record" else None,
+            speed=settings.llm_replay_speed,
+        )
+    if provider != "cerebras":
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    return _make_cerebras_client(api_key)
+
+
+def _get_primary_client() -> ChatClient:
     global _primary_client
     if _primary_client is None:
         settings = get_settings()
-        _primary_client = Cerebras(api_key=settings.cerebras_api_key)
+        _primary_client = _make_client(settings.cerebras_api_key)
     return _primary_client
 
 
-def _get_support_client():
+def _get_support_client() -> ChatClient:
     global _support_client
     if _support_client is None:
         settings = get_settings()
         key = settings.cerebras_api_key_secondary or settings.cerebras_api_key
-        _support_client = Cerebras(api_key=key)
+        _support_client = _make_client(key)
     return _support_client
 
 
+async def close_clients():
+    """Close pooled connections; called on application shutdown."""
+    global _primary_client, _support_client
+    for client in (_primary_client, _support_client):
+        if client is not None:
+            await client.close()
+    _primary_client = _support_client = None
+
+
 def get_model_for_agent(agent_name: str) -> tuple:
     """Return (client, model_name) for a given agent."""
     if agent_name in SUPPORT_MODEL_AGENTS:
@@ -46,78 +268,559 @@ def get_model_for_agent(agent_name: str) -> tuple:
     return _get_primary_client(), PRIMARY_MODEL
 
 
+@contextmanager
+def track_usage():
+    """Accumulate prompt/completion token counts of LLM calls made in the block.
+
+    Yields a dict that is updated in place; cache hits and requests coalesced
+    onto another caller's in-flight request add nothing.
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+@contextmanager
+def partial_results(callback: Callable[[dict], Awaitable[None]] | None):
+    """Stream generate_json(..., stream_partials=True) calls made in the block.
+
+    ``callback`` receives ``{"field", "value"}`` for each completed top-level
+    field of the response and ``{"field", "start", "items"}`` for batches of
+    completed items of top-level arrays, as soon as they have been generated.
+    """
+    token = _partial_callback.set(callback)
+    try:
+        yield
+    finally:
+        _partial_callback.reset(token)
+
+
+class PartialJsonSink:
+    """Parses a streamed completion and forwards completed fields to a callback.
+
+    Each field (and each array position) is delivered at most once, even if
+    the request is retried and the stream starts over.
+    """
+
+    def __init__(self, callback: Callable[[dict], Awaitable[None]]):
+        self.callback = callback
+        self._parser = JsonStreamParser()
+        self._sent_fields: set[str] = set()
+        self._sent_items: dict[str, int] = {}
+        self._pending: list = []
+        self._pending_key: str | None = None
+        self._pending_since = 0.0
+
+    def reset(self):
+        """Start parsing a new attempt's stream from scratch."""
+        self._parser = JsonStreamParser()
+        self._pending = []
+
+    async def feed(self, delta: str):
+        for key, index, value in self._parser.feed(delta):
+            if index is None:
+                await self.flush()
+                if key not in self._sent_fields:
+                    self._sent_fields.add(key)
+                    await self.callback({"field": key, "value": value})
+                continue
+            queued = len(self._pending) if key == self._pending_key else 0
+            if index < self._sent_items.get(key, 0) + queued:
+                continue  # already delivered by an earlier attempt
+            if self._pending and key != self._pending_key:
+                await self.flush()
+            if not self._pending:
+                self._pending_key = key
+                self._pending_since = time.monotonic()
+            self._pending.append(value)
+        if self._pending and (
+            len(self._pending) >= PARTIAL_BATCH_SIZE
+            or time.monotonic() - self._pending_since >= PARTIAL_MAX_DELAY
+        ):
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        key, items = self._pending_key, self._pending
+        start = self._sent_items.get(key, 0)
+        self._sent_items[key] = start + len(items)
+        self._pending = []
+        await self.callback({"field": key, "start": start, "items": items})
+
+
+def _record_usage(response):
+    usage = _usage.get()
+    if usage is None or getattr(response, "usage", None) is None:
+        return
+    usage["calls"] += 1
+    usage["prompt_tokens"] += response.usage.prompt_tokens or 0
+    usage["completion_tokens"] += response.usage.completion_tokens or 0
+
+
+def _sampling_params(max_tokens: int | None, response_format: dict | None = None) -> dict:
+    params = dict(SAMPLING_PARAMS)
+    if max_tokens is not None:
+        params["max_completion_tokens"] = max_tokens
+    if response_format is not None:
+        params["response_format"] = response_format
+    return params
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_latencies: dict[str, LatencyTracker] = {}
+
+
+def _route_name(client: ChatClient, model: str) -> str:
+    key = "primary" if client is _primary_client else "secondary"
+    return f"{model}@{key}_key"
+
+
+def _get_breaker(route: str) -> CircuitBreaker:
+    if route not in _breakers:
+        settings = get_settings()
+        _breakers[route] = CircuitBreaker(
+            route,
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            reset_seconds=settings.llm_breaker_reset_seconds,
+        )
+    return _breakers[route]
+
+
+def _get_latency(route: str) -> LatencyTracker:
+    return _latencies.setdefault(route, LatencyTracker())
+
+
+def get_route_stats() -> dict:
+    return {
+        route: {
+            **breaker.stats(),
+            "p50_seconds": _get_latency(route).percentile(50),
+            "p95_seconds": _get_latency(route).percentile(95),
+        }
+        for route, breaker in _breakers.items()
+    }
+
+
+def _fallback_routes(agent_name: str) -> list[tuple[ChatClient, str]]:
+    """Alternative (client, model) routes, in order, after the agent's own."""
+    if agent_name in SUPPORT_MODEL_AGENTS:
+        return [(_get_primary_client(), PRIMARY_MODEL)]
+    settings = get_settings()
+    if settings.cerebras_api_key_secondary and settings.cerebras_api_key_secondary != settings.cerebras_api_key:
+        # Same model, served from the second key's quota
+        return [(_get_support_client(), PRIMARY_MODEL)]
+    return []
+
+
+def _build_messages(prompt: str, system_instruction: str) -> list[dict]:
+    messages = []
+    if system_instruction:
+        messages.append({"role": "system", "content": system_instruction})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+async def _complete(
+    client: ChatClient,
+    model: str,
+    messages: list[dict],
+    priority: int = PRIORITY_BACKGROUND,
+    params: dict = SAMPLING_PARAMS,
+) -> str:
+    sink = _stream_sink.get()
+    async with get_scheduler(model).slot(priority):
+        if sink is None:
+            response = await client.chat.completions.create(
+                messages=messages,
+                model=model,
+                **params,
+            )
+            _record_usage(response)
+            return response.choices[0].message.content
+
+        sink.reset()
+        stream = await client.chat.completions.create(
+            messages=messages,
+            model=model,
+            stream=True,
+            **params,
+        )
+        parts = []
+        try:
+            async for chunk in stream:
+                _record_usage(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    await sink.feed(parts[-1])
+        finally:
+            await stream.close()
+        await sink.flush()
+    return "".join(parts)
+
+
 async def generate(
     prompt: str,
     system_instruction: str = "",
     agent_name: str = "",
+    priority: int = PRIORITY_BACKGROUND,
+    use_cache: bool = True,
+    max_tokens: int | None = None,
+    response_format: dict | None = None,
 ) -> str:
-    """Generate text using the appropriate model based on agent routing."""
-    try:
-        client, model = get_model_for_agent(agent_name)
-        messages = []
-        if system_instruction:
-            messages.append({"role": "system", "content": system_instruction})
-        messages.append({"role": "user", "content": prompt})
-
-        def _call():
-            response = client.chat.completions.create(
-                messages=messages,
-                model=model,
-                max_completion_tokens=16384,
-                temperature=0.7,
-                top_p=0.9,
+    """Generate text using the appropriate model based on agent routing.
+
+    ``priority`` orders this request in the per-model scheduler queue; use
+    PRIORITY_INTERACTIVE for user-facing calls. When the response cache is
+    enabled, identical requests are answered from disk unless ``use_cache``
+    is False or the agent is listed in LLM_CACHE_BYPASS_AGENTS.
+    ``max_tokens`` overrides the default completion token cap and
+    ``response_format`` is passed through to the provider.
+    """
+    messages = _build_messages(prompt, system_instruction)
+    client, model = get_model_for_agent(agent_name)
+    params = _sampling_params(max_tokens, response_format)
+    if _stream_sink.get() is not None:
+        # Partials go to this caller's sink; a shared flight would stream to only one of them
+        return await _generate(client, model, messages, agent_name, priority, use_cache, params)
+    flight_key = (make_key(model, messages, params), use_cache)
+    return await _flight.do(
+        flight_key,
+        lambda: _generate(client, model, messages, agent_name, priority, use_cache, params),
+    )
+
+
+async def _generate(
+    client: ChatClient,
+    model: str,
+    messages: list[dict],
+    agent_name: str,
+    priority: int,
+    use_cache: bool,
+    params: dict,
+) -> str:
+    cache = get_llm_cache()
+    cache_key = None
+    if cache is not None:
+        if use_cache and agent_name not in get_settings().llm_cache_bypass_agent_set:
+            cache_key = make_key(model, messages, params)
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                return cached
+        else:
+            cache.bypassed += 1
+
+    text = await _generate_uncached(client, model, messages, agent_name, priority, params)
+    if cache_key is not None:
+        await asyncio.to_thread(cache.put, cache_key, model, agent_name, text)
+    return text
+
+
+async def _call_route(
+    client: ChatClient,
+    model: str,
+    messages: list[dict],
+    priority: int,
+    params: dict,
+) -> str:
+    """Call one route, retrying transient errors with jittered exponential backoff.
+
+    Fails fast with CircuitOpenError while the route's breaker is open.
+    """
+    settings = get_settings()
+    route = _route_name(client, model)
+    breaker = _get_breaker(route)
+    for attempt in range(max(1, settings.llm_retry_attempts)):
+        if not breaker.allow():
+            raise CircuitOpenError(f"{route} is unavailable (circuit open)")
+        started = time.monotonic()
+        try:
+            text = await _complete(client, model, messages, priority, params)
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_cancelled()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= settings.llm_retry_attempts:
+                raise
+            await asyncio.sleep(
+                backoff_delay(attempt, settings.llm_retry_base_delay, settings.llm_retry_max_delay)
             )
-            return response.choices[0].message.content
+            continue
+        breaker.record_success()
+        _get_latency(route).record(time.monotonic() - started)
+        return text
 
-        return await asyncio.to_thread(_call)
+
+async def _generate_uncached(
+    client: ChatClient,
+    model: str,
+    messages: list[dict],
+    agent_name: str,
+    priority: int,
+    params: dict = SAMPLING_PARAMS,
+) -> str:
+    """Call the agent's route, falling back to (or hedging with) the next route."""
+    settings = get_settings()
+    routes = [(client, model)] + _fallback_routes(agent_name)
+    errors: list[Exception] = []
+    try:
+        # Two racing streams would interleave partial results, so streamed calls are not hedged
+        if settings.llm_hedge_enabled and len(routes) > 1 and _stream_sink.get() is None:
+            threshold = _get_latency(_route_name(client, model)).percentile(
+                settings.llm_hedge_percentile
+            )
+            (c1, m1), (c2, m2) = routes[:2]
+            return await hedged(
+                lambda: _call_route(c1, m1, messages, priority, params),
+                lambda: _call_route(c2, m2, messages, priority, params),
+                delay=max(settings.llm_hedge_min_delay_seconds, threshold or 0.0),
+            )
+        for route_client, route_model in routes:
+            try:
+                return await _call_route(route_client, route_model, messages, priority, params)
+            except Exception as e:
+                errors.append(e)
+        raise errors[0]
     except Exception as e:
-        error_msg = str(e)
-        # Fallback: if support model fails, try primary
-        if agent_name in SUPPORT_MODEL_AGENTS:
+        raise _api_error(e) from e
+
+
+def _api_error(e: Exception) -> RuntimeError:
+    error_msg = str(e)
+    if "API key" in error_msg or "auth" in error_msg.lower():
+        return RuntimeError("Invalid Cerebras API key. Check CEREBRAS_API_KEY in .env")
+    return RuntimeError(f"Cerebras API error: {error_msg}")
+
+
+@asynccontextmanager
+async def _open_stream(
+    client: ChatClient,
+    model: str,
+    messages: list[dict],
+    priority: int,
+    params: dict,
+):
+    """Open a streamed completion on one route and hold its scheduler slot while it is read.
+
+    Opening is retried and guarded by the route's breaker like ``_call_route``;
+    once deltas may have been shown, failures are recorded but not retried.
+    """
+    settings = get_settings()
+    route = _route_name(client, model)
+    breaker = _get_breaker(route)
+    attempts = max(1, settings.llm_retry_attempts)
+    for attempt in range(attempts):
+        if not breaker.allow():
+            raise CircuitOpenError(f"{route} is unavailable (circuit open)")
+        async with get_scheduler(model).slot(priority):
+            started = time.monotonic()
             try:
-                fallback_client = _get_primary_client()
-                messages = []
-                if system_instruction:
-                    messages.append({"role": "system", "content": system_instruction})
-                messages.append({"role": "user", "content": prompt})
-
-                def _fallback():
-                    response = fallback_client.chat.completions.create(
-                        messages=messages,
-                        model=PRIMARY_MODEL,
-                        max_completion_tokens=16384,
-                        temperature=0.7,
-                        top_p=0.9,
-                    )
-                    return response.choices[0].message.content
-
-                return await asyncio.to_thread(_fallback)
-            except Exception:
-                pass
-        if "API key" in error_msg or "auth" in error_msg.lower():
-            raise RuntimeError(
-                "Invalid Cerebras API key. Check CEREBRAS_API_KEY in .env"
-            ) from e
-        raise RuntimeError(f"Cerebras API error: {error_msg}") from e
+                stream = await client.chat.completions.create(
+                    messages=messages,
+                    model=model,
+                    stream=True,
+                    **params,
+                )
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    breaker.record_cancelled()
+                    raise
+                breaker.record_failure()
+                if attempt + 1 >= attempts:
+                    raise
+                stream = None
+            if stream is not None:
+                try:
+                    yield stream
+                except (asyncio.CancelledError, GeneratorExit):
+                    breaker.record_cancelled()
+                    raise
+                except Exception as e:
+                    if is_transient(e):
+                        breaker.record_failure()
+                    else:
+                        breaker.record_cancelled()
+                    raise
+                else:
+                    breaker.record_success()
+                    _get_latency(route).record(time.monotonic() - started)
+                finally:
+                    await stream.close()
+                return
+        await asyncio.sleep(
+            backoff_delay(attempt, settings.llm_retry_base_delay, settings.llm_retry_max_delay)
+        )
+
+
+async def generate_stream(
+    prompt: str,
+    system_instruction: str = "",
+    agent_name: str = "",
+    priority: int = PRIORITY_INTERACTIVE,
+) -> AsyncIterator[str]:
+    """Stream generated text as it arrives, one content delta at a time.
+
+    Streamed responses bypass the response cache and single-flight. Opening
+    the stream is retried and falls back to the agent's other routes like
+    ``generate``; errors after that propagate. Closing the generator early
+    (e.g. on client disconnect) closes the upstream HTTP stream and releases
+    the scheduler slot.
+    """
+    messages = _build_messages(prompt, system_instruction)
+    client, model = get_model_for_agent(agent_name)
+    errors: list[Exception] = []
+    for route_client, route_model in [(client, model)] + _fallback_routes(agent_name):
+        opened = False
+        try:
+            async with _open_stream(route_client, route_model, messages, priority, SAMPLING_PARAMS) as stream:
+                opened = True
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            return
+        except Exception as e:
+            if opened:
+                raise _api_error(e) from e
+            errors.append(e)
+    raise _api_error(errors[0]) from errors[0]
+
+
+# Per-agent counters for generate_json outcomes
+_json_stats: dict[str, dict[str, int]] = {}
+
+JSON_INSTRUCTION = "\n\nIMPORTANT: Respond ONLY with valid JSON. No markdown, no code fences, no extra text."
+
+REASK_PROMPT = """Your previous response could not be used: {error}
+
+Return the corrected response as a single valid JSON object{schema_hint}. Keep the content, fix only the structure. Respond with the JSON only.
+
+PREVIOUS RESPONSE:
+{response}"""
+
+
+def get_json_stats() -> dict:
+    """Per-agent counts; parse_failure_rate is the share of responses unusable even after repair."""
+    return {
+        agent: {
+            **counts,
+            "parse_failure_rate": round(counts["reasked"] / counts["calls"], 4) if counts["calls"] else 0.0,
+        }
+        for agent, counts in _json_stats.items()
+    }
+
+
+def _response_format(schema: type[BaseModel] | None) -> dict | None:
+    mode = get_settings().llm_structured_output
+    if mode == "json_schema" and schema is not None:
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema(), "strict": False},
+        }
+    if mode in ("json_schema", "json_object"):
+        return {"type": "json_object"}
+    return None
+
+
+def _parse_response(text: str, schema: type[BaseModel] | None) -> tuple[dict | None, bool, str]:
+    """Return (result, repaired, error); result is None when the response is unusable."""
+    try:
+        value, repaired = parse_json(text)
+    except ValueError as e:
+        return None, False, str(e)
+    if not isinstance(value, dict):
+        return None, repaired, f"expected a JSON object, got {type(value).__name__}"
+    if schema is None:
+        return value, repaired, ""
+    try:
+        return schema.model_validate(value).model_dump(), repaired, ""
+    except ValidationError as e:
+        return None, repaired, f"does not match the schema: {e}"
 
 
 async def generate_json(
     prompt: str,
     system_instruction: str = "",
     agent_name: str = "",
+    use_cache: bool = True,
+    max_tokens: int | None = None,
+    schema: type[BaseModel] | None = None,
+    stream_partials: bool = False,
 ) -> dict:
-    """Generate and parse JSON from Cerebras response."""
-    system_instruction += "\n\nIMPORTANT: Respond ONLY with valid JSON. No markdown, no code fences, no extra text."
-    text = await generate(prompt, system_instruction, agent_name=agent_name)
-    text = text.strip()
-    # Remove markdown code fences if present
-    if text.startswith("```"):
-        text = re.sub(r"^```(?:json)?\s*\n?", "", text)
-        text = re.sub(r"\n?```\s*$", "", text)
+    """Generate JSON, validated against the pydantic ``schema`` when one is given.
+
+    Structured output is requested as configured by LLM_STRUCTURED_OUTPUT.
+    Malformed or truncated JSON is repaired locally; only when that fails,
+    or the result does not validate, is the model asked once to correct its
+    response. If that fails too, returns ``{"raw_response", "parse_error": True}``.
+
+    With ``stream_partials`` inside a partial_results() block, the response
+    is streamed and its completed fields are reported while it is generated.
+    """
+    stats = _json_stats.setdefault(
+        agent_name or "default", {"calls": 0, "repaired": 0, "reasked": 0, "failed": 0}
+    )
+    stats["calls"] += 1
+    system_instruction += JSON_INSTRUCTION
+    response_format = _response_format(schema)
+    callback = _partial_callback.get()
+    sink = PartialJsonSink(callback) if stream_partials and callback is not None else None
+    token = _stream_sink.set(sink)
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        match = re.search(r"\{[\s\S]*\}", text)
-        if match:
-            return json.loads(match.group())
-        return {"raw_response": text, "parse_error": True}
+        text = await generate(
+            prompt,
+            system_instruction,
+            agent_name=agent_name,
+            use_cache=use_cache,
+            max_tokens=max_tokens,
+            response_format=response_format,
+        )
+    finally:
+        _stream_sink.reset(token)
+    result, repaired, error = _parse_response(text, schema)
+    if result is not None:
+        stats["repaired"] += repaired
+        return result
+
+    # Don't keep serving an unusable response from the cache
+    cache = get_llm_cache()
+    if cache is not None:
+        _, model = get_model_for_agent(agent_name)
+        key = make_key(
+            model,
+            _build_messages(prompt, system_instruction),
+            _sampling_params(max_tokens, response_format),
+        )
+        await asyncio.to_thread(cache.invalidate, key)
+
+    # Last resort: a targeted re-ask to fix the structure
+    stats["reasked"] += 1
+    schema_hint = ""
+    if schema is not None:
+        schema_hint = f" matching this JSON schema: {json.dumps(schema.model_json_schema(), separators=(',', ':'))}"
+    retry_text = await generate(
+        REASK_PROMPT.format(error=error[:1000], schema_hint=schema_hint, response=text),
+        system_instruction,
+        agent_name=agent_name,
+        use_cache=False,
+        max_tokens=max_tokens,
+        response_format=response_format,
+    )
+    result, repaired, _ = _parse_response(retry_text, schema)
+    if result is not None:
+        stats["repaired"] += repaired
+        return result
+    stats["failed"] += 1
+    return {"raw_response": text, "parse_error": True}
@@ -0,0 +1,135 @@
+"""Per-paper fan-out of analysis progress events with replay.
+
+Each paper has a bus holding a bounded ring buffer of its recent events,
+numbered in order. Any number of subscribers can attach: a new one is first
+sent the buffered events after the ID it last saw (the SSE ``Last-Event-ID``
+of a reconnecting ``EventSource``), then live events. A subscriber that
+falls a whole buffer behind is dropped; it reconnects and replays from
+where it stopped.
+
+Event IDs are ``<bus epoch>-<sequence>``. An ID from an earlier bus (e.g.
+before a restart) replays everything still buffered.
+"""
+
+import asyncio
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncGenerator
+from app.config import get_settings
+
+# SSE comment sent while a stream is idle, so proxies keep the connection open
+KEEPALIVE_SECONDS = 15.0
+# Buses of papers with no subscribers and no running analysis kept for replay
+MAX_IDLE_BUSES = 256
+
+
+class _Subscriber:
+    def __init__(self, capacity: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=capacity + 1)
+
+
+class ProgressBus:
+    """Ring buffer of one paper's progress events and its live subscribers."""
+
+    def __init__(self, paper_id: str, capacity: int = 512):
+        self.paper_id = paper_id
+        self.capacity = capacity
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.active = False  # an analysis is in progress; streams stay open
+        self.run_start = 1  # sequence number of the current (or last) analysis' first event
+        self._events: deque[tuple[int, dict, bool]] = deque(maxlen=capacity)
+        self._subscribers: set[_Subscriber] = set()
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def _parse_id(self, last_event_id: str | None) -> int:
+        """Sequence number a subscriber has seen up to; without an ID, the start of the current run."""
+        if not last_event_id:
+            return self.run_start - 1
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return 0
+        return int(seq)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: dict, final: bool = False) -> str:
+        """Append an event; ``final`` marks the end of an analysis and closes live streams."""
+        self.seq += 1
+        if not self.active:
+            self.run_start = self.seq
+        entry = (self.seq, event, final)
+        self._events.append(entry)
+        self.active = not final
+        for sub in list(self._subscribers):
+            if sub.queue.qsize() >= self.capacity:
+                # Too far behind to catch up live; it will replay on reconnect
+                self._subscribers.discard(sub)
+                sub.queue.put_nowait(None)
+            else:
+                sub.queue.put_nowait(entry)
+        return self.event_id(self.seq)
+
+    async def subscribe(self, last_event_id: str | None = None) -> AsyncGenerator[tuple[str, dict] | None, None]:
+        """Yield (event ID, event) pairs, or None while idle, until the analysis ends.
+
+        Buffered events after ``last_event_id`` (by default, those of the
+        current or last analysis) are replayed first. If no analysis is
+        running, the stream ends after the replay.
+        """
+        seen = self._parse_id(last_event_id)
+        sub = _Subscriber(self.capacity)
+        for entry in self._events:
+            if entry[0] > seen:
+                sub.queue.put_nowait(entry)
+        if self.active:
+            self._subscribers.add(sub)
+        else:
+            sub.queue.put_nowait(None)
+
+        try:
+            while True:
+                try:
+                    entry = await asyncio.wait_for(sub.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if entry is None:
+                    return
+                seq, event, final = entry
+                yield self.event_id(seq), event
+                if final:
+                    return
+        finally:
+            self._subscribers.discard(sub)
+
+
+_buses: OrderedDict[str, ProgressBus] = OrderedDict()
+
+
+def get_progress_bus(paper_id: str) -> ProgressBus:
+    """The paper's bus, created on first use; idle buses beyond MAX_IDLE_BUSES are evicted."""
+    bus = _buses.get(paper_id)
+    if bus is None:
+        bus = _buses[paper_id] = ProgressBus(paper_id, get_settings().progress_buffer_size)
+        idle = [pid for pid, b in _buses.items() if not b.active and not b.subscriber_count]
+        for pid in idle[: max(0, len(idle) - MAX_IDLE_BUSES)]:
+            del _buses[pid]
+    _buses.move_to_end(paper_id)
+    return bus
+
+
+def peek_progress_bus(paper_id: str) -> ProgressBus | None:
+    return _buses.get(paper_id)
+
+
+def get_progress_stats() -> dict:
+    return {
+        "buses": len(_buses),
+        "active": sum(b.active for b in _buses.values()),
+        "subscribers": sum(b.subscriber_count for b in _buses.values()),
+    }
@@ -0,0 +1,130 @@
+"""Token-based budgeting of the context that goes into agent prompts.
+
+Tokens are counted with the embedding model's tokenizer, which is already
+loaded for indexing and tracks the chat models' tokenizers closely enough
+for budgeting. Structured values are serialised as compact JSON rather than
+``str()`` so no budget is spent on Python repr noise.
+
+Tokenizing is CPU-bound, so agents call ``pack_context`` through ``run_cpu``.
+"""
+
+import json
+from typing import Any
+from app.rag.chunker import iter_token_chunks
+from app.rag.embeddings import get_tokenizer
+from app.rag.lexical_index import LexicalIndex
+
+# Word-pieces are practically never longer than this, so text beyond
+# budget * MAX_CHARS_PER_TOKEN cannot fit and is not worth tokenizing
+MAX_CHARS_PER_TOKEN = 12
+# Size of the passages a long part is split into when it is cut by relevance
+PASSAGE_TOKENS = 128
+
+
+def compact(value: Any) -> str:
+    """Serialise a context value for a prompt: strings as-is, the rest as compact JSON."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _offsets(text: str) -> list[tuple[int, int]]:
+    encoded = get_tokenizer()(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    return encoded["offset_mapping"]
+
+
+def count_tokens(text: str) -> int:
+    return len(_offsets(text)) if text else 0
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Return the longest prefix of text that is at most max_tokens tokens."""
+    if max_tokens <= 0 or not text:
+        return ""
+    head = text[: max_tokens * MAX_CHARS_PER_TOKEN]
+    offsets = _offsets(head)
+    if len(offsets) <= max_tokens:
+        return head
+    return head[: offsets[max_tokens - 1][1]]
+
+
+def select_relevant(text: str, max_tokens: int, query: str) -> str:
+    """Return the passages of text most relevant to query that fit in max_tokens.
+
+    The opening passage (title, abstract) is always kept; the rest are ranked
+    by BM25 against the query, with unmatched passages filling any space left
+    in document order. Chosen passages are joined in their original order.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    # Small budgets get smaller passages so several of them can still be chosen
+    size = max(1, min(PASSAGE_TOKENS, max_tokens // 4))
+    passages = [
+        chunk["text"]
+        for chunk in iter_token_chunks(text, get_tokenizer(), max_tokens=size, overlap_tokens=0)
+    ]
+    if len(passages) < 2:
+        return truncate_tokens(text, max_tokens)
+
+    ranked = [i for i, _ in LexicalIndex.build(passages).search(query, len(passages)) if i != 0]
+    matched = set(ranked)
+    order = [0] + ranked + [i for i in range(1, len(passages)) if i not in matched]
+    chosen, used = [], 0
+    for i in order:
+        needed = count_tokens(passages[i])
+        if used + needed <= max_tokens:
+            chosen.append(i)
+            used += needed
+    if not chosen:
+        return truncate_tokens(text, max_tokens)
+    return truncate_tokens("\n\n".join(passages[i] for i in sorted(chosen)), max_tokens)
+
+
+def pack_context(
+    parts: dict[str, Any],
+    budget: int,
+    weights: dict[str, float] | None = None,
+    queries: dict[str, Any] | None = None,
+) -> dict[str, str]:
+    """Fit named context parts into a shared token budget.
+
+    Parts that fit within their weighted share of the budget are kept whole
+    and their unused share is redistributed; whatever does not fit is cut to
+    its share, so a long paper excerpt absorbs everything short metadata
+    fields leave over. A part with an entry in ``queries`` is cut to the
+    passages most relevant to that query (see select_relevant) rather than
+    to its head. Returns the compacted (and possibly truncated) text of
+    every part under its original name.
+    """
+    weights = weights or {}
+    queries = {name: compact(query) for name, query in (queries or {}).items()}
+    texts = {name: compact(value) for name, value in parts.items()}
+    needs = {}
+    for name, text in texts.items():
+        head = text[: budget * MAX_CHARS_PER_TOKEN]
+        # Text past the cut-off is known not to fit in the whole budget
+        needs[name] = count_tokens(head) if len(head) == len(text) else budget + 1
+
+    packed: dict[str, str] = {}
+    pending = [name for name in texts if needs[name]]
+    remaining = budget
+    while pending:
+        per_weight = remaining / sum(weights.get(name, 1.0) for name in pending)
+        fitting = [n for n in pending if needs[n] <= per_weight * weights.get(n, 1.0)]
+        if not fitting:
+            break
+        for name in fitting:
+            packed[name] = texts[name]
+            remaining -= needs[name]
+            pending.remove(name)
+
+    if pending:
+        per_weight = remaining / sum(weights.get(name, 1.0) for name in pending)
+        for name in pending:
+            share = int(per_weight * weights.get(name, 1.0))
+            if queries.get(name):
+                packed[name] = select_relevant(texts[name], share, queries[name])
+            else:
+                packed[name] = truncate_tokens(texts[name], share)
+
+    return {name: packed.get(name, "") for name in texts}
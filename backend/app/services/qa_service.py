@@ -1,27 +1,22 @@
 """RAG-based Q&A service for asking questions about papers."""
 
 import json
+from typing import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models import ChatMessage
-from app.rag.retriever import retrieve_chunks
-from app.services.llm_service import generate
+from app.rag.retriever import retrieve_chunk_hits
+from app.services.llm_service import generate, generate_stream, PRIORITY_INTERACTIVE
 
 
-async def ask_question(
-    paper_id: str,
-    question: str,
-    db: AsyncSession,
-) -> str:
-    """Answer a question about a paper using RAG.
-
-    1. Retrieve relevant chunks from the paper's vector index.
-    2. Fetch recent chat history for conversational context.
-    3. Build augmented prompt and generate answer.
-    4. Store both messages in the database.
-    """
+async def _build_prompt(paper_id: str, question: str, db: AsyncSession) -> str:
+    """Retrieve relevant chunks and recent chat history and build the Q&A prompt."""
     # Step 1: Retrieve relevant chunks
-    chunks = retrieve_chunks(paper_id, question, top_k=5)
+    hits = await retrieve_chunk_hits(paper_id, question, top_k=5)
+    chunks = [
+        f"[Page {hit['page']}]\n{hit['text']}" if hit["page"] is not None else hit["text"]
+        for hit in hits
+    ]
     context_text = "\n\n---\n\n".join(chunks) if chunks else "No relevant context found."
 
     # Step 2: Get recent chat history
@@ -42,7 +37,7 @@ async def ask_question(
             history_text += f"{role}: {msg.content}\n"
 
     # Step 3: Build prompt
-    prompt = f"""You are a research paper analysis assistant. Answer the user's question based on the provided context from the paper. Be accurate and cite specific parts of the paper when possible. If the answer cannot be determined from the context, say so honestly.
+    return f"""You are a research paper analysis assistant. Answer the user's question based on the provided context from the paper. Be accurate and cite specific parts of the paper when possible. If the answer cannot be determined from the context, say so honestly.
 
 RELEVANT PAPER SECTIONS:
 {context_text}
@@ -53,19 +48,62 @@ USER QUESTION: {question}
 
 Provide a clear, well-structured answer."""
 
-    # Step 4: Generate answer
-    answer = await generate(prompt)
 
-    # Step 5: Store messages
+async def _save_exchange(paper_id: str, question: str, answer: str, db: AsyncSession):
     user_msg = ChatMessage(paper_id=paper_id, role="user", content=question)
     assistant_msg = ChatMessage(paper_id=paper_id, role="assistant", content=answer)
     db.add(user_msg)
     db.add(assistant_msg)
     await db.commit()
 
+
+async def ask_question(
+    paper_id: str,
+    question: str,
+    db: AsyncSession,
+) -> str:
+    """Answer a question about a paper using RAG.
+
+    1. Retrieve relevant chunks from the paper's vector index.
+    2. Fetch recent chat history for conversational context.
+    3. Build augmented prompt and generate answer.
+    4. Store both messages in the database.
+    """
+    prompt = await _build_prompt(paper_id, question, db)
+
+    # Step 4: Generate answer
+    # Chat answers are not cached: asking again should produce a fresh answer
+    answer = await generate(prompt, priority=PRIORITY_INTERACTIVE, use_cache=False)
+
+    # Step 5: Store messages
+    await _save_exchange(paper_id, question, answer, db)
     return answer
 
 
+async def ask_question_stream(
+    paper_id: str,
+    question: str,
+    db: AsyncSession,
+) -> AsyncIterator[str]:
+    """Like ask_question, but yield the answer token by token.
+
+    The question/answer pair is stored only once the stream completes; if the
+    consumer stops early, the upstream request is cancelled and nothing is saved.
+    """
+    prompt = await _build_prompt(paper_id, question, db)
+
+    parts = []
+    stream = generate_stream(prompt, priority=PRIORITY_INTERACTIVE)
+    try:
+        async for delta in stream:
+            parts.append(delta)
+            yield delta
+    finally:
+        await stream.aclose()
+
+    await _save_exchange(paper_id, question, "".join(parts), db)
+
+
 async def get_chat_history(paper_id: str, db: AsyncSession) -> list[dict]:
     """Get full chat history for a paper."""
     stmt = (
@@ -1,10 +1,15 @@
 """Async Semantic Scholar API client for finding related papers."""
 
 import httpx
+from app.services.single_flight import SingleFlight, single_flight
 
 S2_API_BASE = "https://api.semanticscholar.org/graph/v1"
 
+# Results are mutated by callers (e.g. the plagiarism checker), so each gets a copy
+_flight = SingleFlight("semantic_scholar", copy_results=True)
 
+
+@single_flight(_flight)
 async def search_related(title: str, limit: int = 10) -> list[dict]:
     """Search Semantic Scholar for papers related to the given title."""
     async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
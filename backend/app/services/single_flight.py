@@ -0,0 +1,79 @@
+"""Single-flight coalescing of identical concurrent async calls.
+
+While a call for a given key is in flight, further calls with the same key
+wait for it and receive its result instead of issuing a duplicate request.
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Hashable
+
+_groups: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """A named group of coalesced calls with its own counters.
+
+    The underlying call runs as its own task, so a caller being cancelled
+    never cancels the request other callers are waiting on. With
+    ``copy_results`` each caller gets a deep copy, for results that callers
+    may mutate.
+    """
+
+    def __init__(self, name: str, copy_results: bool = False):
+        self.name = name
+        self.copy_results = copy_results
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        _groups[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result) if self.copy_results else result
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+def single_flight(group: SingleFlight):
+    """Decorate an async function so identical concurrent calls are coalesced.
+
+    The key is the function name plus its bound arguments (defaults applied),
+    so ``f(x)`` and ``f(x, limit=10)`` share a flight when 10 is the default.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (fn.__qualname__, tuple(bound.arguments.items()))
+            return await group.do(key, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def get_single_flight_stats() -> dict:
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,77 @@
+"""Micro-benchmark: list-based chunk_text vs streaming iter_word_chunks.
+
+Measures wall time and tracemalloc peak for chunking a synthetic paper of
+the given number of pages. The streaming chunker is consumed in batches of
+EMBED_BATCH_SIZE, the way build_paper_index consumes it.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunker --pages 300
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from itertools import islice
+from app.rag.chunker import chunk_text, iter_word_chunks
+
+EMBED_BATCH_SIZE = 64
+
+
+def synthetic_paper(pages: int, words_per_page: int = 600, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocab = [
+        "transformer", "attention", "dataset", "baseline", "accuracy", "we", "propose",
+        "the", "model", "results", "table", "figure", "BLEU", "F1", "ablation", "of",
+        "training", "loss", "gradient", "layer", "embedding", "evaluation", "and",
+    ]
+    parts = []
+    for page in range(1, pages + 1):
+        words = " ".join(rng.choice(vocab) for _ in range(words_per_page))
+        parts.append(f"--- Page {page} ---\n{words}")
+    return "\n\n".join(parts)
+
+
+def run_list(text: str) -> int:
+    chunks = chunk_text(text)
+    return sum(len(c) for c in chunks)
+
+
+def run_stream(text: str) -> int:
+    total = 0
+    chunk_iter = iter_word_chunks(text)
+    while batch := list(islice(chunk_iter, EMBED_BATCH_SIZE)):
+        total += sum(len(c["text"]) for c in batch)
+    return total
+
+
+def measure(fn, text: str, repeat: int) -> tuple[float, float]:
+    """Return (best seconds, peak MiB)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = synthetic_paper(args.pages)
+    print(f"text: {len(text) / (1024 * 1024):.1f} MiB, {args.pages} pages")
+    for name, fn in (("chunk_text (list)", run_list), ("iter_word_chunks", run_stream)):
+        seconds, peak = measure(fn, text, args.repeat)
+        print(f"{name:<20} {seconds * 1000:8.1f} ms   peak {peak:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
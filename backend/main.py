@@ -1,25 +1,65 @@
 """ResearchPilot FastAPI application entry point."""
 
+import asyncio
+import logging
 import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
 from app.database import init_db
-from app.routers import papers, chat, workspace, conversations
+from app.routers import papers, chat, workspace, conversations, search, batches
+from app.rag.vector_store import get_store_cache
+from app.services.cpu_executor import get_cpu_executor
+from app.rag.embeddings import get_embedding_batcher, get_tokenizer
+from app.rag.global_index import get_global_index
+from app.services.llm_service import (
+    close_clients,
+    get_json_stats,
+    get_route_stats,
+    get_scheduler_stats,
+)
+from app.services.llm_cache import get_llm_cache
+from app.services.single_flight import get_single_flight_stats
+from app.orchestrator import get_pipeline_stats
+from app.services.job_queue import get_job_queue
+from app.services.progress_bus import get_progress_stats
+from app.agents.base_agent import get_token_stats
+
+
+def configure_logging():
+    """Send app.* log records to stderr; uvicorn only configures its own loggers."""
+    logger = logging.getLogger("app")
+    logger.setLevel(get_settings().log_level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown."""
     settings = get_settings()
+    configure_logging()
     # Create required directories
     os.makedirs(settings.upload_dir, exist_ok=True)
     os.makedirs(settings.vector_store_dir, exist_ok=True)
     # Initialize database
     await init_db()
+    # Load (or rebuild) the corpus-wide vector index off the event loop
+    await asyncio.to_thread(get_global_index)
+    # Load the embedding model (and its tokenizer, used for prompt budgeting) before the first request
+    await asyncio.to_thread(get_tokenizer)
+    # Start analysis workers; they resume jobs left queued or running by a previous run
+    await get_job_queue().start()
     print("✅ ResearchPilot backend started")
     yield
+    await get_job_queue().stop()
+    get_global_index().save()
+    get_cpu_executor().shutdown()
+    await close_clients()
     print("👋 ResearchPilot backend shutting down")
 
 
@@ -45,8 +85,30 @@ app.include_router(papers.router)
 app.include_router(chat.router)
 app.include_router(workspace.router)
 app.include_router(conversations.router)
+app.include_router(search.router)
+app.include_router(batches.router)
 
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok", "service": "ResearchPilot"}
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Runtime counters for in-process caches and pools."""
+    return {
+        "vector_store_cache": get_store_cache().stats(),
+        "cpu_executor": get_cpu_executor().stats(),
+        "embedding_batcher": get_embedding_batcher().stats(),
+        "global_index": get_global_index().stats(),
+        "llm_scheduler": get_scheduler_stats(),
+        "llm_routes": get_route_stats(),
+        "llm_json": get_json_stats(),
+        "llm_cache": get_llm_cache().stats() if get_llm_cache() else {"enabled": False},
+        "single_flight": get_single_flight_stats(),
+        "pipeline": get_pipeline_stats(),
+        "llm_tokens": get_token_stats(),
+        "jobs": get_job_queue().stats(),
+        "progress": get_progress_stats(),
+    }
@@ -1,7 +1,7 @@
 "use client";
 import { useState, useEffect, useCallback } from "react";
 import { useParams, useRouter } from "next/navigation";
-import { getPaper, analyzeSSE, getKnowledgeGraph, getPlagiarismReport, getPeerReview, Paper, AgentProgress, KnowledgeGraphData, PlagiarismReportData, PeerReviewData } from "@/lib/api";
+import { getPaper, analyzeSSE, applyPartial, getKnowledgeGraph, getPlagiarismReport, getPeerReview, Paper, AgentProgress, KnowledgeGraphData, PlagiarismReportData, PeerReviewData } from "@/lib/api";
 import dynamic from "next/dynamic";
 
 const KnowledgeGraph = dynamic(() => import("@/components/KnowledgeGraph"), { ssr: false });
@@ -40,6 +40,8 @@ export default function PaperPage() {
     const [paper, setPaper] = useState<Paper | null>(null);
     const [activeTab, setActiveTab] = useState("structured_extractor");
     const [agentStatus, setAgentStatus] = useState<Record<string, AgentProgress>>({});
+    // Results assembled from streamed partials while the analysis runs
+    const [partialResults, setPartialResults] = useState<Record<string, Record<string, unknown>>>({});
     const [analyzing, setAnalyzing] = useState(false);
     const [analysisComplete, setAnalysisComplete] = useState(false);
     const [graphData, setGraphData] = useState<KnowledgeGraphData | null>(null);
@@ -63,10 +65,16 @@ export default function PaperPage() {
     useEffect(() => { fetchPaper(); }, [fetchPaper]);
 
     const startAnalysis = () => {
-        setAnalyzing(true); setAnalysisComplete(false); setAgentStatus({});
+        setAnalyzing(true); setAnalysisComplete(false); setAgentStatus({}); setPartialResults({});
+        // Reports of the previous run are refetched once this one completes
+        setGraphData(null); setPlagiarismData(null); setPeerReviewData(null);
         analyzeSSE(
             paperId,
-            (event) => setAgentStatus((prev) => ({ ...prev, [event.agent]: event })),
+            (event) => {
+                setAgentStatus((prev) => ({ ...prev, [event.agent]: event }));
+                const partial = event.partial;
+                if (partial) setPartialResults((prev) => ({ ...prev, [event.agent]: applyPartial(prev[event.agent], partial) }));
+            },
             () => { setAnalyzing(false); setAnalysisComplete(true); fetchPaper(); },
             (err) => { setAnalyzing(false); console.error(err); }
         );
@@ -105,7 +113,9 @@ export default function PaperPage() {
         }
     }, [activeTab, analysisComplete, paperId, peerReviewData, peerReviewLoading]);
 
-    const activeResult = paper?.analyses?.[activeTab]?.result;
+    // While analyzing, show what the agent has streamed so far; final results are fetched when it ends
+    const liveResult = analyzing ? partialResults[activeTab] : undefined;
+    const activeResult = liveResult || paper?.analyses?.[activeTab]?.result;
 
     return (
         <main className="min-h-screen">
@@ -218,7 +228,7 @@ export default function PaperPage() {
                                 );
                             })()}
 
-                            {analyzing && !analysisComplete && (
+                            {analyzing && !analysisComplete && !activeResult && (
                                 <div className="glass-card-static p-12 text-center">
                                     <div className="text-4xl mb-4 animate-pulse-slow">⚡</div>
                                     <p className="text-lg text-white mb-2">Agents are working...</p>
@@ -226,7 +236,13 @@ export default function PaperPage() {
                                 </div>
                             )}
 
-                            {activeResult && <ResultView agentName={activeTab} result={activeResult as Record<string, unknown>} graphData={graphData} graphLoading={graphLoading} plagiarismData={plagiarismData} plagiarismLoading={plagiarismLoading} peerReviewData={peerReviewData} peerReviewLoading={peerReviewLoading} />}
+                            {liveResult && agentStatus[activeTab]?.status === "running" && (
+                                <div className="mb-4 flex items-center gap-2 text-xs text-cyan-300">
+                                    <span className="animate-pulse-slow">⚡</span> Generating — sections appear as they are written
+                                </div>
+                            )}
+
+                            {activeResult && <ResultView agentName={activeTab} result={activeResult as Record<string, unknown>} streaming={!!liveResult} graphData={graphData} graphLoading={graphLoading} plagiarismData={plagiarismData} plagiarismLoading={plagiarismLoading} peerReviewData={peerReviewData} peerReviewLoading={peerReviewLoading} />}
 
                             {!activeResult && analysisComplete && (() => {
                                 const tabAnalysis = paper?.analyses?.[activeTab];
@@ -269,15 +285,16 @@ export default function PaperPage() {
 }
 
 /* ==== Result Views ==== */
-function ResultView({ agentName, result, graphData, graphLoading, plagiarismData, plagiarismLoading, peerReviewData, peerReviewLoading }: { agentName: string; result: Record<string, unknown>; graphData?: KnowledgeGraphData | null; graphLoading?: boolean; plagiarismData?: PlagiarismReportData | null; plagiarismLoading?: boolean; peerReviewData?: PeerReviewData | null; peerReviewLoading?: boolean }) {
+function ResultView({ agentName, result, streaming, graphData, graphLoading, plagiarismData, plagiarismLoading, peerReviewData, peerReviewLoading }: { agentName: string; result: Record<string, unknown>; streaming?: boolean; graphData?: KnowledgeGraphData | null; graphLoading?: boolean; plagiarismData?: PlagiarismReportData | null; plagiarismLoading?: boolean; peerReviewData?: PeerReviewData | null; peerReviewLoading?: boolean }) {
     if (agentName === "structured_extractor") return <ExtractionView data={result} />;
     if (agentName === "simplifier") return <SimplifierView data={result} />;
     if (agentName === "related_research") return <RelatedResearchView data={result} />;
     if (agentName === "gap_detector") return <GapDetectorView data={result} />;
     if (agentName === "implementation_guide") return <ImplementationView data={result} />;
-    if (agentName === "knowledge_graph") return <KnowledgeGraphView data={result} graphData={graphData} graphLoading={graphLoading} />;
-    if (agentName === "plagiarism_checker") return <PlagiarismCheckView data={result} plagiarismData={plagiarismData} plagiarismLoading={plagiarismLoading} />;
-    if (agentName === "peer_review") return <PeerReviewView data={result} peerReviewData={peerReviewData} peerReviewLoading={peerReviewLoading} />;
+    // Streamed results are incomplete: use them as they are rather than the fetched reports
+    if (agentName === "knowledge_graph") return <KnowledgeGraphView data={result} graphData={streaming ? null : graphData} graphLoading={!streaming && graphLoading} streaming={streaming} />;
+    if (agentName === "plagiarism_checker") return <PlagiarismCheckView data={result} plagiarismData={streaming ? null : plagiarismData} plagiarismLoading={!streaming && plagiarismLoading} streaming={streaming} />;
+    if (agentName === "peer_review") return <PeerReviewView data={result} peerReviewData={streaming ? null : peerReviewData} peerReviewLoading={!streaming && peerReviewLoading} streaming={streaming} />;
     return <GenericView data={result} />;
 }
 
@@ -481,7 +498,7 @@ function ImplementationView({ data }: { data: Record<string, unknown> }) {
     );
 }
 
-function KnowledgeGraphView({ data, graphData, graphLoading }: { data: Record<string, unknown>; graphData?: KnowledgeGraphData | null; graphLoading?: boolean }) {
+function KnowledgeGraphView({ data, graphData, graphLoading, streaming }: { data: Record<string, unknown>; graphData?: KnowledgeGraphData | null; graphLoading?: boolean; streaming?: boolean }) {
     // Use graph data from dedicated endpoint, or fall back to analysis result
     const effectiveData: KnowledgeGraphData | null = graphData || (data?.nodes ? data as unknown as KnowledgeGraphData : null);
 
@@ -500,7 +517,7 @@ function KnowledgeGraphView({ data, graphData, graphLoading }: { data: Record<st
             <div className="glass-card-static p-12 text-center">
                 <p className="text-4xl mb-4">🕸️</p>
                 <p className="text-lg text-white mb-2">Knowledge Graph</p>
-                <p className="text-sm text-slate-500">Graph data is not available. Try re-analyzing the paper.</p>
+                <p className="text-sm text-slate-500">{streaming ? "Extracting entities..." : "Graph data is not available. Try re-analyzing the paper."}</p>
             </div>
         );
     }
@@ -508,9 +525,14 @@ function KnowledgeGraphView({ data, graphData, graphLoading }: { data: Record<st
     return <KnowledgeGraph data={effectiveData} />;
 }
 
-function PlagiarismCheckView({ data, plagiarismData, plagiarismLoading }: { data: Record<string, unknown>; plagiarismData?: PlagiarismReportData | null; plagiarismLoading?: boolean }) {
+function PlagiarismCheckView({ data, plagiarismData, plagiarismLoading, streaming }: { data: Record<string, unknown>; plagiarismData?: PlagiarismReportData | null; plagiarismLoading?: boolean; streaming?: boolean }) {
     const effectiveData = plagiarismData || (data?.overall_originality_score !== undefined ? data as unknown as PlagiarismReportData : null);
 
+    if (streaming) {
+        // The report component needs the whole report; show the sections generated so far
+        return <GenericView data={data} />;
+    }
+
     if (plagiarismLoading) {
         return (
             <div className="glass-card-static p-12 text-center">
@@ -534,9 +556,32 @@ function PlagiarismCheckView({ data, plagiarismData, plagiarismLoading }: { data
     return <PlagiarismReport data={effectiveData as any} />;
 }
 
-function PeerReviewView({ data, peerReviewData, peerReviewLoading }: { data: Record<string, unknown>; peerReviewData?: PeerReviewData | null; peerReviewLoading?: boolean }) {
+function PeerReviewView({ data, peerReviewData, peerReviewLoading, streaming }: { data: Record<string, unknown>; peerReviewData?: PeerReviewData | null; peerReviewLoading?: boolean; streaming?: boolean }) {
     const effectiveData = peerReviewData || (data?.reviewers ? data as unknown as PeerReviewData : null);
 
+    if (streaming && !(effectiveData?.reviewers && effectiveData.meta_review)) {
+        // Reviews arrive one reviewer at a time; the meta-review comes last
+        const reviewers = (effectiveData?.reviewers || []).filter(Boolean);
+        return (
+            <div className="space-y-4">
+                {reviewers.map((r, i) => (
+                    <div key={i} className="glass-card-static p-5 animate-slide-up">
+                        <div className="flex items-center justify-between mb-2">
+                            <h3 className="text-sm font-semibold text-white">{String(r.reviewer_id || `Reviewer ${i + 1}`)}</h3>
+                            {typeof r.overall_score === "number" && <span className="text-sm font-mono text-indigo-300">{r.overall_score}/10</span>}
+                        </div>
+                        {r.expertise && <p className="text-xs text-slate-500 mb-2">{String(r.expertise)}</p>}
+                        {typeof r.summary === "string" && <p className="text-sm text-slate-300">{r.summary}</p>}
+                    </div>
+                ))}
+                <div className="glass-card-static p-6 text-center">
+                    <div className="text-2xl mb-2 animate-pulse-slow">📝</div>
+                    <p className="text-sm text-slate-500">{reviewers.length ? "Waiting for the remaining reviews and the meta-review..." : "3 AI reviewers are evaluating the paper"}</p>
+                </div>
+            </div>
+        );
+    }
+
     if (peerReviewLoading) {
         return (
             <div className="glass-card-static p-12 text-center">
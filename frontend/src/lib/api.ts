@@ -20,10 +20,37 @@ export interface AgentResult {
     finished_at?: string;
 }
 
+/** A completed part of an agent's result, streamed while the rest is generated. */
+export interface AgentPartial {
+    field: string;
+    /** The whole value of a top-level field */
+    value?: unknown;
+    /** Or a batch of items of a top-level array, starting at index `start` */
+    start?: number;
+    items?: unknown[];
+}
+
 export interface AgentProgress {
     agent: string;
     status: string;
     detail: string;
+    partial?: AgentPartial;
+}
+
+/** Merge a streamed partial into the agent's result assembled so far. */
+export function applyPartial(
+    result: Record<string, unknown> | undefined,
+    partial: AgentPartial
+): Record<string, unknown> {
+    const next = { ...(result || {}) };
+    if (partial.items) {
+        const items = Array.isArray(next[partial.field]) ? [...(next[partial.field] as unknown[])] : [];
+        partial.items.forEach((item, i) => { items[(partial.start || 0) + i] = item; });
+        next[partial.field] = items;
+    } else {
+        next[partial.field] = partial.value;
+    }
+    return next;
 }
 
 export interface ChatMessage {
@@ -130,8 +157,10 @@ export function analyzeSSE(
     };
 
     eventSource.onerror = () => {
-        eventSource.close();
-        onError("Connection to analysis stream lost");
+        // While CONNECTING the browser retries on its own, resuming via Last-Event-ID
+        if (eventSource.readyState === EventSource.CLOSED) {
+            onError("Connection to analysis stream lost");
+        }
     };
 
     return () => eventSource.close();